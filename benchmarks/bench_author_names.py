@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark parsing of author-heavy name lists.
+
+Parses the author fields of generated collaboration papers (hundreds of
+authors per entry) with the previous regex split, the name parser without
+and with the cache of parsed names, and generates author keys (which only
+parse the first names of a list). Run with
+`python benchmarks/bench_author_names.py [entries] [max authors]`
+"""
+
+import re
+import sys
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+from zotero_bibtize.names import parse_name, split_names
+
+
+def regex_split(authors):
+    """The previous author split (only extracting the last names)."""
+    return [lastname.strip() for author in re.split(r'\b(?:and)\b', authors)
+            for lastname in author.split(',')[:1]]
+
+
+def parse_uncached(authors):
+    return [parse_name.__wrapped__(name) for name in split_names(authors)]
+
+
+def parse_cached(authors):
+    return [parse_name(name) for name in split_names(authors)]
+
+
+def best_of(function, author_fields, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        parse_name.cache_clear()
+        start = time.perf_counter()
+        for authors in author_fields:
+            function(authors)
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def main(num_entries, max_authors):
+    generator = LibraryGenerator(max_authors=max_authors)
+    author_fields = [generator.authors() for _ in range(num_entries)]
+    num_names = sum(len(split_names(authors)) for authors in author_fields)
+    print("{} entries, {:.0f} authors / entry".format(
+        num_entries, num_names / num_entries))
+    # fragment cache disabled such that every key parses its author list
+    key_format = CompiledKeyFormat('[author:3]', cache_size=0)
+    scenarios = [
+        ('regex split', regex_split),
+        ('parser (uncached)', parse_uncached),
+        ('parser (cached)', parse_cached),
+        ('author key [author:3]', lambda authors: key_format.generate_key(
+            {'author': authors})),
+    ]
+    for (label, function) in scenarios:
+        elapsed = best_of(function, author_fields)
+        print("{:<22}: {:10.2f} us / entry".format(
+            label, elapsed * 1e6 / num_entries))
+    cache_info = parse_name.cache_info()
+    print("name cache: {} hits, {} misses".format(cache_info.hits,
+                                                  cache_info.misses))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark citation filtered processing.
+
+Compares processing a full generated library with processing only the
+entries cited in a document (as read from an .aux file). Run with
+`python benchmarks/bench_aux_filter.py [entries] [citations]`
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize import BibTexFile
+
+
+KEY_FORMAT = "[author:2:capitalize][title:2:capitalize][year]"
+
+
+def main(num_entries, num_citations):
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, 'library.bib')
+        with open(library, 'w') as bibfile:
+            bibfile.write(LibraryGenerator().library(num_entries))
+        start = time.perf_counter()
+        bibliography = BibTexFile(library, KEY_FORMAT)
+        full = time.perf_counter() - start
+        keys = [e.key for e in bibliography.entries]
+        citations = set(random.Random(0).sample(keys, num_citations))
+        start = time.perf_counter()
+        cited = BibTexFile(library, KEY_FORMAT, citations=citations)
+        filtered = time.perf_counter() - start
+    assert sorted(e.key for e in cited.entries) == sorted(citations)
+    print("{} entries, {} citations".format(num_entries, num_citations))
+    print("all entries  : {:8.2f} s".format(full))
+    print("cited entries: {:8.2f} s (speedup {:.1f})".format(
+        filtered, full / filtered))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 300)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the memory required by parsed entries.
+
+Compares the memory (measured by tracemalloc) of the compact `BibEntry`
+representation with the previous representation keeping the raw entry
+string, a per-entry list of omitted fields and an `OrderedDict` of fields.
+Run with `python benchmarks/bench_entry_memory.py [number of entries]`
+"""
+
+import collections
+import sys
+import tracemalloc
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+class LegacyBibEntry(BibEntry):
+    """Previous representation (instances have a __dict__)."""
+    def __init__(self, bibtex_entry_string, key_format=None,
+                 omit_fields=None):
+        super().__init__(bibtex_entry_string, key_format, omit_fields,
+                         keep_raw=True)
+        self.fields_to_omit = []
+        if omit_fields is not None:
+            self.fields_to_omit = omit_fields.split(',')
+        self.fields = collections.OrderedDict(self.fields)
+
+
+def measure(entry_class, entries):
+    """Memory allocated by the parsed entries in bytes per entry."""
+    tracemalloc.start()
+    # copy the raw strings inside the traced region (as read from the file)
+    # such that retained raw strings are accounted to the entries
+    parsed = [entry_class(e + '\n', omit_fields='keywords,url')
+              for e in entries]
+    (current, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return current / len(entries)
+
+
+def main(num_entries):
+    entries = LibraryGenerator().entries(num_entries)
+    text = sum(len(e.encode('utf-8')) for e in entries) / len(entries)
+    legacy = measure(LegacyBibEntry, entries)
+    compact = measure(BibEntry, entries)
+    print("{} entries, {:.0f} bytes of text per entry".format(num_entries,
+                                                              text))
+    print("  previous: {:8.0f} bytes / entry".format(legacy))
+    print("  compact:  {:8.0f} bytes / entry".format(compact))
+    print("  ratio:    {:8.2f}".format(legacy / compact))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the identification of entry boundaries in large bibtex files.
+
+Compares the previous char by char scanner with the regex based scanner of
+`BibTexFile.strip_down_entries` (on str and on a memory-mapped file) and
+the chunked streaming reader. Run with
+`python benchmarks/bench_entry_scanner.py [size in MB]` (default: 100 MB)
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import (BibTexFile, iter_entry_strings,
+                                           iter_mapped_entry_strings)
+
+
+def legacy_strip_down_entries(content):
+    """Previous implementation visiting every single char."""
+    content_iterator = enumerate(content)
+    bibtex_entries = []
+    for (index, char) in content_iterator:
+        if char == '@':
+            start_index = index
+        if char == '{':
+            stack = 1
+            while stack != 0:
+                next_index, next_char = next(content_iterator)
+                if next_char == '}':
+                    stack -= 1
+                elif next_char == '{':
+                    stack += 1
+            bibtex_entries.append((start_index, next_index+1))
+    return bibtex_entries
+
+
+def timed(label, size, function, *args):
+    """Run the function and print its run time and throughput."""
+    start = time.perf_counter()
+    result = function(*args)
+    duration = time.perf_counter() - start
+    print("{:<28} {:8.3f} s {:10.1f} MB/s".format(label, duration,
+                                                  size / duration / 1e6))
+    return result
+
+
+def main(size_mb):
+    generator = LibraryGenerator()
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, 'library.bib')
+        num_entries = 0
+        with open(path, 'w') as bibfile:
+            while bibfile.tell() < size_mb * 1e6:
+                bibfile.write(generator.entry(num_entries) + "\n\n")
+                num_entries += 1
+        size = os.path.getsize(path)
+        print("{} entries, {:.1f} MB".format(num_entries, size / 1e6))
+        content = open(path, 'r').read()
+        legacy = timed("char by char (str)", size, legacy_strip_down_entries,
+                       content)
+        current = timed("regex scanner (str)", size,
+                        BibTexFile.strip_down_entries, content)
+        assert legacy == current
+        with open(path, 'rb') as bibfile:
+            with mmap.mmap(bibfile.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped:
+                timed("regex scanner (mmap)", size,
+                      BibTexFile.strip_down_entries, mapped)
+        del content
+        timed("mmap incl. decoding", size,
+              lambda: sum(1 for _ in iter_mapped_entry_strings(path)))
+        timed("streaming reader", size,
+              lambda: sum(1 for _ in iter_entry_strings(path)))
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark skipping unwanted fields during tokenization.
+
+Compares decoding all fields and dropping the omitted ones afterwards (the
+previous behavior of `--omit-fields`) with skipping unwanted fields before
+they are unescaped. Run with
+`python benchmarks/bench_field_filter.py [number of entries]`
+"""
+
+import sys
+import timeit
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+KEY_FORMAT = "[author:capitalize][year][title:2:capitalize]"
+
+
+def decode_and_drop(entries, omit_fields=None, keep_fields=None):
+    """Previous implementation decoding all fields."""
+    omitted = omit_fields.split(',') if omit_fields else []
+    kept = keep_fields.split(',') if keep_fields else None
+    serialized = []
+    for entry in entries:
+        bibentry = BibEntry(entry, KEY_FORMAT)
+        for label in list(bibentry.fields):
+            if label in omitted or (kept is not None and label not in kept):
+                del bibentry.fields[label]
+        serialized.append(str(bibentry))
+    return serialized
+
+
+def skip_unwanted(entries, omit_fields=None, keep_fields=None):
+    return [str(BibEntry(entry, KEY_FORMAT, omit_fields=omit_fields,
+                         keep_fields=keep_fields))
+            for entry in entries]
+
+
+def main(num_entries):
+    entries = LibraryGenerator(abstract_words=300).entries(num_entries)
+    for (label, filters) in [
+            ('--omit-fields abstract,keywords,url',
+             {'omit_fields': 'abstract,keywords,url'}),
+            ('--keep-fields author,title,year,doi',
+             {'keep_fields': 'author,title,year,doi'})]:
+        assert (decode_and_drop(entries, **filters) ==
+                skip_unwanted(entries, **filters))
+        before = min(timeit.repeat(lambda: decode_and_drop(entries, **filters),
+                                   number=1, repeat=5))
+        after = min(timeit.repeat(lambda: skip_unwanted(entries, **filters),
+                                  number=1, repeat=5))
+        print(label)
+        print("  decode and drop: {:8.2f} us / entry".format(
+            before * 1e6 / num_entries))
+        print("  skip unwanted:   {:8.2f} us / entry".format(
+            after * 1e6 / num_entries))
+        print("  speedup:         {:8.2f}".format(before / after))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
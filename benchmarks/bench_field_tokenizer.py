@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark splitting of entry contents into fields.
+
+Compares the single pass tokenizer used by `BibEntry` with the previous
+comma-split implementation for generated entries whose abstract contains a
+growing number of commas. Run with
+`python benchmarks/bench_field_tokenizer.py`
+"""
+
+import re
+import timeit
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+def legacy_split(entry_content):
+    """Previous implementation rescanning the field after every comma."""
+    def is_balanced(string):
+        return len(re.findall(r"\{", string)) == len(re.findall(r"\}", string))
+    entry_contents = []
+    tmp_entry = ''
+    for part in re.split(r",", entry_content):
+        tmp_entry += re.sub(r'\n', '', part)
+        if is_balanced(tmp_entry):
+            entry_contents.append(re.sub(r'\n', '', tmp_entry))
+            tmp_entry = ''
+        else:
+            tmp_entry += ','
+    return entry_contents
+
+
+def entry_content(generator, num_commas):
+    """Generated entry content with `num_commas` commas in the abstract."""
+    fields = []
+    for (label, content) in generator.entry_fields():
+        if label == 'abstract':
+            content = ", ".join(generator.word()
+                                for _ in range(num_commas + 1))
+        elif label == 'keywords':
+            content = content.replace(',', '')
+        fields.append("  {} = {{{}}}".format(label, content))
+    return "bibkey,\n{}\n".format(",\n".join(fields))
+
+
+def main():
+    bibentry = BibEntry("@misc{key,}")
+    generator = LibraryGenerator()
+    print("{:>8} {:>14} {:>14}".format("commas", "tokenizer [ms]",
+                                       "legacy [ms]"))
+    for num_commas in [500, 1000, 2000, 4000, 8000]:
+        content = entry_content(generator, num_commas)
+        repeat = 5
+        tokenizer = min(timeit.repeat(
+            lambda: bibentry.tokenize_entry_content(content), number=1,
+            repeat=repeat))
+        legacy = min(timeit.repeat(lambda: legacy_split(content), number=1,
+                                   repeat=repeat))
+        print("{:>8} {:>14.3f} {:>14.3f}".format(num_commas, tokenizer * 1e3,
+                                                 legacy * 1e3))
+
+
+if __name__ == '__main__':
+    main()
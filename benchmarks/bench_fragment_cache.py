@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark caching of formatted key fragments.
+
+Compares key generation with and without the fragment cache of
+`CompiledKeyFormat` on a generated library with recurring journal names and
+authors. Run with `python benchmarks/bench_fragment_cache.py [entries]`
+"""
+
+import sys
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+KEY_FORMAT = "[author:2:capitalize][journal:abbreviate][year]"
+
+
+def main(num_entries):
+    entries = [BibEntry(e) for e in LibraryGenerator().entries(num_entries)]
+    fields = [(dict(e.fields), e.type) for e in entries]
+    timings = {}
+    for cache_size in [0, 4096]:
+        # use a new (empty) cache for every repetition
+        runs = []
+        for _ in range(5):
+            key_format = CompiledKeyFormat(KEY_FORMAT, cache_size=cache_size)
+            start = time.perf_counter()
+            for (entry_fields, entry_type) in fields:
+                key_format.generate_key(entry_fields, entry_type)
+            runs.append(time.perf_counter() - start)
+        timings[cache_size] = min(runs)
+        fragment_cache = key_format.fragment_cache
+        hit_rate = fragment_cache.hits / (fragment_cache.hits +
+                                          fragment_cache.misses)
+        print("cache size {:>5}: {:8.2f} us / entry (hit rate {:.1%})".format(
+            cache_size, timings[cache_size] * 1e6 / num_entries, hit_rate))
+    print("speedup: {:.2f}".format(timings[0] / timings[4096]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
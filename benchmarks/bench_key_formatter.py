@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmarks for the title and journal key formatters.
+
+Compares the set based function word removal with the previous regex
+based implementation on the titles and journals of generated entries. Run
+with `python benchmarks/bench_key_formatter.py`
+"""
+
+import re
+import timeit
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.bibkey_formatter import KeyFormatter
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+class RegexKeyFormatter(KeyFormatter):
+    """Key formatter using the previous regex based function word removal."""
+    def remove_function_words(self, content_string, is_journal=False):
+        function_words = "|".join(sorted(self.function_words))
+        word_regex = r"(?i)(?:^|(?<=\s))({})(?:(?=\s)|$)".format(
+            function_words)
+        if is_journal:
+            word_regex = r"(?i)(?:^|(?<=\s))({})(?:(?=\s))".format(
+                function_words)
+        content_string = re.sub(word_regex, '', content_string).strip()
+        return re.sub(r"\s+", " ", content_string)
+
+
+def time_formatter(formatter_class, field, values, format_args):
+    """Time per call of the formatter for the given field values."""
+    formatters = [formatter_class({field: value}, entry_type='article')
+                  for value in values]
+    method = 'format_{}_key'.format(field)
+    calls = [getattr(formatter, method) for formatter in formatters]
+    number = 200
+    timing = min(timeit.repeat(lambda: [c(*format_args) for c in calls],
+                               number=number, repeat=5))
+    return timing * 1e6 / (number * len(calls))
+
+
+def main(num_entries=50):
+    entries = [BibEntry(entry) for entry in
+               LibraryGenerator(abstract_words=0).entries(num_entries)]
+    titles = [e.fields['title'] for e in entries]
+    journals = [e.fields['journal'] for e in entries]
+    print("{:<22} {:>12} {:>12}".format("formatter", "sets [us]",
+                                        "regex [us]"))
+    for (field, values, format_args) in [('title', titles, ('3', 'lower')),
+                                         ('journal', journals, ('abbr',))]:
+        sets = time_formatter(KeyFormatter, field, values, format_args)
+        regex = time_formatter(RegexKeyFormatter, field, values, format_args)
+        print("{:<22} {:>12.2f} {:>12.2f}".format(
+            "format_{}_key".format(field), sets, regex))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark lazily decoded entry fields on abstract-heavy libraries.
+
+Compares eagerly and lazily decoded entries for workflows only requiring
+the generated keys, a subset of fields or the complete output. Run with
+`python benchmarks/bench_lazy_fields.py [number of entries]`
+"""
+
+import sys
+import timeit
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+KEY_FORMAT = "[author:capitalize][year][title:2:capitalize]"
+
+
+def keys_only(entries, lazy):
+    return [(e.type, e.key) for e in
+            (BibEntry(entry, KEY_FORMAT, lazy=lazy) for entry in entries)]
+
+
+def subset(entries, lazy):
+    return [(e.fields.get('doi'), e.fields.get('year')) for e in
+            (BibEntry(entry, lazy=lazy) for entry in entries)]
+
+
+def serialized(entries, lazy):
+    return [str(BibEntry(entry, KEY_FORMAT, lazy=lazy)) for entry in entries]
+
+
+def main(num_entries):
+    entries = LibraryGenerator(abstract_words=500).entries(num_entries)
+    size = sum(len(e) for e in entries) / len(entries)
+    print("{} entries, {:.0f} chars per entry".format(num_entries, size))
+    for workflow in [keys_only, subset, serialized]:
+        assert workflow(entries, True) == workflow(entries, False)
+        eager = min(timeit.repeat(lambda: workflow(entries, False),
+                                  number=1, repeat=5))
+        lazy = min(timeit.repeat(lambda: workflow(entries, True),
+                                 number=1, repeat=5))
+        print(workflow.__name__)
+        print("  eager:   {:8.2f} us / entry".format(eager * 1e6 / num_entries))
+        print("  lazy:    {:8.2f} us / entry".format(lazy * 1e6 / num_entries))
+        print("  speedup: {:8.2f}".format(eager / lazy))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
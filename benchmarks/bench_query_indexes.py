@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark queries on parsed bibliographies.
+
+Compares linear scans over `BibTexFile.entries` with the index based
+`get`, `by_doi` and `filter` queries (including the time to build the
+indexes on the first query). Run with
+`python benchmarks/bench_query_indexes.py [entries] [queries]`
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize import BibTexFile
+
+
+def timed(function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    return time.perf_counter() - start
+
+
+def main(num_entries, num_queries):
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, 'library.bib')
+        with open(library, 'w') as bibfile:
+            bibfile.write(LibraryGenerator().library(num_entries))
+        bibliography = BibTexFile(library, key_format='[author][year]',
+                                  lazy=True)
+    entries = bibliography.entries
+    sample = random.Random(0).sample(entries, num_queries)
+    keys = [e.key for e in sample]
+    dois = [e.fields['doi'] for e in sample]
+    type_years = [(e.type, e.fields['year']) for e in sample]
+    scenarios = [
+        ('key', keys,
+         lambda key: next(e for e in entries if e.key == key),
+         bibliography.get),
+        ('doi', dois,
+         lambda doi: next(e for e in entries if e.fields.get('doi') == doi),
+         bibliography.by_doi),
+        ('type + year', type_years,
+         lambda query: [e for e in entries if e.type == query[0] and
+                        e.fields.get('year') == query[1]],
+         lambda query: bibliography.filter(type=query[0], year=query[1])),
+    ]
+    print("{} entries, {} queries".format(num_entries, num_queries))
+    for (label, queries, scan, query) in scenarios:
+        bibliography.invalidate_indexes()
+        build = timed(query, queries[:1])
+        scan_time = timed(scan, queries)
+        index_time = timed(query, queries[1:])
+        print("{:<12}: scan {:9.1f} us / query, index {:6.1f} us / query "
+              "(first query incl. index build {:.1f} ms), speedup {:.0f}"
+              .format(label, scan_time * 1e6 / len(queries),
+                      index_time * 1e6 / (len(queries) - 1), build * 1e3,
+                      scan_time * (len(queries) - 1) / len(queries) /
+                      index_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200)
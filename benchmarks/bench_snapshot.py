@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark loading parsed bibliographies from snapshots.
+
+Compares parsing a generated library with loading the parsed entries from
+a binary snapshot (validated against the unchanged and against a touched
+bibtex file, the latter requiring to hash the file). Run with
+`python benchmarks/bench_snapshot.py [entries]`
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize import BibTexFile
+
+
+KEY_FORMAT = "[author:capitalize][journal:abbreviate][year]"
+
+
+def best_of(function, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def main(num_entries):
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, 'library.bib')
+        snapshot = os.path.join(directory, 'library.snapshot')
+        with open(library, 'w') as bibfile:
+            bibfile.write(LibraryGenerator().library(num_entries))
+        parse = best_of(lambda: BibTexFile(library, KEY_FORMAT), repeat=1)
+        bibliography = BibTexFile(library, KEY_FORMAT)
+        start = time.perf_counter()
+        bibliography.save_snapshot(snapshot)
+        save = time.perf_counter() - start
+        load = best_of(lambda: BibTexFile.load_snapshot(snapshot))
+
+        def touch_and_load():
+            os.utime(library)
+            BibTexFile.load_snapshot(snapshot)
+        load_hashed = best_of(touch_and_load)
+        loaded = BibTexFile.load_snapshot(snapshot)
+        assert [str(e) for e in loaded.entries] == \
+            [str(e) for e in bibliography.entries]
+        print("{} entries ({:.1f} MB bibtex, {:.1f} MB snapshot)".format(
+            num_entries, os.path.getsize(library) / 1e6,
+            os.path.getsize(snapshot) / 1e6))
+    print("parse bibtex file      : {:8.3f} s".format(parse))
+    print("save snapshot          : {:8.3f} s".format(save))
+    print("load snapshot          : {:8.3f} s (speedup {:.1f})".format(
+        load, parse / load))
+    print("load snapshot (hashed) : {:8.3f} s (speedup {:.1f})".format(
+        load_hashed, parse / load_hashed))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the removal of Zotero escape sequences.
+
+Compares the single pass unescaping of `BibEntry` with the successive
+application of the individual unescape methods on generated Zotero-style
+entries. Run with `python benchmarks/bench_unescape.py`
+"""
+
+import timeit
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+def successive_unescape(bibentry, entry):
+    """Previous implementation rewriting the entry for every escape."""
+    entry = bibentry.remove_zotero_escaping(entry)
+    entry = bibentry.remove_special_char_escaping(entry)
+    entry = bibentry.remove_curly_from_capitalized(entry)
+    return entry
+
+
+def compare(label, bibentry, entries, number=200):
+    """Print timings of both implementations for the given entries."""
+    fused = min(timeit.repeat(
+        lambda: [bibentry.unescape_bibtex_entry_string(e) for e in entries],
+        number=number, repeat=5))
+    successive = min(timeit.repeat(
+        lambda: [successive_unescape(bibentry, e) for e in entries],
+        number=number, repeat=5))
+    per_entry = 1e6 / (number * len(entries))
+    print(label)
+    print("  single pass: {:8.2f} us / entry".format(fused * per_entry))
+    print("  successive:  {:8.2f} us / entry".format(successive * per_entry))
+    print("  speedup:     {:8.2f}".format(successive / fused))
+
+
+def main():
+    bibentry = BibEntry("@misc{key,}")
+    compare("generated entries", bibentry,
+            LibraryGenerator().entries(100), number=20)
+    # titles mostly made up of protected (and escaped) words
+    for num_words in [10, 100, 1000]:
+        generator = LibraryGenerator(title_words=num_words, abstract_words=1,
+                                     escape_density=0.3,
+                                     capitalized_density=0.7)
+        compare("entry with {} title words".format(num_words), bibentry,
+                generator.entries(1), number=20)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark writing processed bibliographies.
+
+Compares joining all entries into a single string with streaming them
+through the atomic writer. Run with `python benchmarks/bench_writer.py`
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.zotero_bibtize import BibEntry
+from zotero_bibtize.writer import write_entries
+
+
+def join_and_write(entries, output_file):
+    """Previous implementation joining all entries before writing."""
+    with open(output_file, 'w') as outfile:
+        outfile.write(''.join(map(str, entries)))
+
+
+def measure(label, function, entries, output_file):
+    """Print run time and peak memory allocated while writing."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(entries, output_file)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = os.path.getsize(output_file)
+    print("{:<18} {:8.3f} s {:10.1f} MB/s {:10.1f} MB peak".format(
+        label, duration, size / duration / 1e6, peak / 1e6))
+
+
+def main(num_entries=20000):
+    entries = [BibEntry(entry) for entry in
+               LibraryGenerator().entries(num_entries)]
+    with tempfile.TemporaryDirectory() as tempdir:
+        output_file = os.path.join(tempdir, 'output.bib')
+        measure("join and write", join_and_write, entries, output_file)
+        measure("atomic streaming", write_entries, entries, output_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite covering the processing steps of zotero-bibtize.
+
+Every scenario runs on a synthetic Zotero-style library (cf.
+`zotero_library.py`) and reports its throughput in entries/s and MB/s (of
+raw entry text). Results can be stored as baseline and later runs compared
+against it, scenarios slower than the baseline by more than the threshold
+are flagged as regression (and the exit code is non-zero). Run with
+`python benchmarks/run_benchmarks.py [--save baseline.json]
+[--baseline baseline.json]`
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from zotero_library import LibraryGenerator
+
+from zotero_bibtize.bibkey_formatter import CompiledKeyFormat, KeyFormatter
+from zotero_bibtize.zotero_bibtize import BibEntry, BibTexFile
+
+
+KEY_FORMAT = "[author:capitalize][year][title:2:capitalize]"
+
+
+def best_time(function, repeat):
+    """Best wall time of `repeat` calls of function."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def scenarios(entries, content):
+    """Map scenario names to the functions to benchmark."""
+    bibentry = BibEntry(entries[0])
+    bibentries = [BibEntry(e, KEY_FORMAT) for e in entries]
+    key_format = CompiledKeyFormat(KEY_FORMAT)
+    fields = [(dict(e.fields), e.type) for e in bibentries]
+    bibtex_file = BibTexFile.__new__(BibTexFile)
+    bibtex_file.entries = bibentries
+    bibtex_file.key_map = {}
+    for (index, entry) in enumerate(bibentries):
+        bibtex_file.key_map.setdefault(entry.key, []).append(index)
+    return [
+        ('strip_down_entries',
+         lambda: BibTexFile.strip_down_entries(content)),
+        ('unescape_bibtex_entry_string',
+         lambda: [bibentry.unescape_bibtex_entry_string(e) for e in entries]),
+        ('bibtex_entry_contents',
+         lambda: [bibentry.bibtex_entry_contents(e) for e in entries]),
+        ('generate_key',
+         lambda: [KeyFormatter(f, entry_type=t).generate_key(key_format)
+                  for (f, t) in fields]),
+        ('resolve_unambiguous_keys', bibtex_file.resolve_unambiguous_keys),
+        ('entry_str', lambda: [str(e) for e in bibentries]),
+        ('parse_entries', lambda: [BibEntry(e, key_format) for e in entries]),
+    ]
+
+
+def run(args):
+    """Run all scenarios and return the results."""
+    generator = LibraryGenerator(
+        seed=args.seed, abstract_words=args.abstract_words,
+        escape_density=args.escape_density,
+        collision_rate=args.collision_rate)
+    entries = generator.entries(args.entries)
+    content = "\n\n".join(entries)
+    size = len(content.encode('utf-8'))
+    print("{} entries, {:.2f} MB".format(len(entries), size / 1e6))
+    results = {}
+    for (name, function) in scenarios(entries, content):
+        duration = best_time(function, args.repeat)
+        results[name] = {
+            'seconds': duration,
+            'entries_per_s': len(entries) / duration,
+            'mb_per_s': size / duration / 1e6,
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the results and flag regressions compared to the baseline."""
+    regressions = []
+    print("{:<30} {:>12} {:>10} {:>10}".format('scenario', 'entries/s',
+                                              'MB/s', 'change'))
+    for (name, result) in results.items():
+        change = ''
+        if name in baseline:
+            ratio = result['entries_per_s'] / baseline[name]['entries_per_s']
+            change = '{:+.1%}'.format(ratio - 1)
+            if ratio < 1 - threshold:
+                change += ' REGRESSION'
+                regressions.append(name)
+        print("{:<30} {:>12.0f} {:>10.2f} {:>10}".format(
+            name, result['entries_per_s'], result['mb_per_s'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--entries', type=int, default=2000)
+    parser.add_argument('--abstract-words', type=int, default=150)
+    parser.add_argument('--escape-density', type=float, default=0.05)
+    parser.add_argument('--collision-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help="store the results in this file")
+    parser.add_argument('--baseline', help="compare against this file")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="relative slowdown flagged as regression")
+    args = parser.parse_args(argv)
+    results = run(args)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if args.save:
+        with open(args.save, 'w') as results_file:
+            json.dump({'settings': vars(args), 'results': results},
+                      results_file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
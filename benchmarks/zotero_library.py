@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+Deterministic generator for synthetic Zotero-style bibtex libraries.
+
+The generated entries mimic the Zotero Better BibTeX export, i.e. special
+chars are escaped (`{\\textbackslash}`, `\\{`, `\\_`, ...) and capitalized
+words are protected by braces. Write a library to a file with
+`python benchmarks/zotero_library.py <output file> [number of entries]`
+"""
+
+import random
+import sys
+
+
+SYLLABLES = ['li', 'ion', 'con', 'duc', 'tor', 'bat', 'te', 'ry', 'sol',
+             'id', 'state', 'elec', 'tro', 'lyte', 'ca', 'tho', 'de', 'an',
+             'mo', 'phase', 'struc', 'ture', 'ki', 'net', 'ic', 'ther']
+FUNCTION_WORDS = ['of', 'the', 'and', 'in', 'for', 'on', 'a', 'with']
+LAST_NAMES = ['Chen', 'Rao', 'Adams', 'Van Hove', 'Müller', 'Smith',
+              'Nakamura', 'O\'Brien', 'Dupont', 'Kowalski', 'Garcia', 'Li']
+JOURNALS = ['Solid State Ionics', 'Physical Review B',
+            'Journal of Materials Chemistry A', 'Nature Materials',
+            'Chemistry of Materials', 'The Journal of Chemical Physics']
+ENTRY_TYPES = ['article'] * 8 + ['book', 'incollection', 'misc']
+# escaped forms of special chars as written by Zotero
+ESCAPES = [r'{\textbackslash}ce\{{Li2S}\}', r'\{\vphantom{\}}x\vphantom{\{}\}',
+           r'\_', r'\%',
+           r'\&', r'\$', r'{\textless}', r'{\textgreater}', r'\#',
+           r'{\textasciicircum}', r'{\textasciitilde}', r'{\textbar}']
+
+
+class LibraryGenerator(object):
+    """
+    Generate reproducible Zotero-style bibtex entries.
+
+    :param int seed: seed of the random number generator
+    :param int title_words: mean number of words in titles
+    :param int abstract_words: mean number of words in abstracts
+    :param int max_authors: maximal number of authors per entry
+    :param float escape_density: fraction of title / abstract words which
+        are replaced by escaped special chars
+    :param float capitalized_density: fraction of title words which are
+        capitalized and protected by braces
+    :param float collision_rate: fraction of entries sharing author, year
+        and title with a previous entry (i.e. with colliding keys)
+    """
+    def __init__(self, seed=0, title_words=10, abstract_words=150,
+                 max_authors=6, escape_density=0.05, capitalized_density=0.2,
+                 collision_rate=0.1):
+        self.random = random.Random(seed)
+        self.title_words = title_words
+        self.abstract_words = abstract_words
+        self.max_authors = max_authors
+        self.escape_density = escape_density
+        self.capitalized_density = capitalized_density
+        self.collision_rate = collision_rate
+        self.generated = []
+
+    def word(self):
+        """A random lowercase word."""
+        num_syllables = self.random.randint(1, 4)
+        return "".join(self.random.choice(SYLLABLES)
+                       for _ in range(num_syllables))
+
+    def text(self, mean_words, capitalized_density=0.0):
+        """Random text with escaped and capitalized words."""
+        num_words = max(1, int(self.random.gauss(mean_words,
+                                                 mean_words / 4)))
+        words = []
+        for _ in range(num_words):
+            chance = self.random.random()
+            if chance < self.escape_density:
+                words.append(self.random.choice(ESCAPES))
+            elif chance < self.escape_density + 0.15:
+                words.append(self.random.choice(FUNCTION_WORDS))
+            elif chance < self.escape_density + 0.15 + capitalized_density:
+                words.append('{{{}}}'.format(self.word().capitalize()))
+            else:
+                words.append(self.word())
+        return " ".join(words)
+
+    def authors(self):
+        """Random author list in `Last, First and ...` form."""
+        authors = []
+        for _ in range(self.random.randint(1, self.max_authors)):
+            authors.append('{}, {}.'.format(
+                self.random.choice(LAST_NAMES),
+                self.random.choice('ABCDEFGHIJKLMNOPRSTW')))
+        return " and ".join(authors)
+
+    def entry_fields(self):
+        """Fields of a new entry (reusing a previous one to force collisions)"""
+        if self.generated and self.random.random() < self.collision_rate:
+            (author, year, title) = self.random.choice(self.generated)
+        else:
+            author = self.authors()
+            year = str(self.random.randint(1990, 2020))
+            title = self.text(self.title_words, self.capitalized_density)
+            self.generated.append((author, year, title))
+        doi = '10.{}/{}.{}'.format(self.random.randint(1000, 9999),
+                                   self.word(), self.random.randint(1, 10**6))
+        first_page = self.random.randint(1, 2000)
+        return [
+            ('title', title),
+            ('volume', str(self.random.randint(1, 500))),
+            ('url', 'https://doi.org/{}'.format(doi)),
+            ('doi', doi),
+            ('abstract', self.text(self.abstract_words)),
+            ('journal', self.random.choice(JOURNALS)),
+            ('author', author),
+            ('year', year),
+            ('keywords', ", ".join(self.word() for _ in range(5))),
+            ('pages', '{}--{}'.format(first_page,
+                                      first_page + self.random.randint(1, 30))),
+        ]
+
+    def entry(self, index):
+        """A single bibtex entry string."""
+        fields = ",\n".join("\t{} = {{{}}}".format(label, content)
+                            for (label, content) in self.entry_fields())
+        return "@{}{{entry_{},\n{}\n}}".format(
+            self.random.choice(ENTRY_TYPES), index, fields)
+
+    def entries(self, num_entries):
+        """List of `num_entries` bibtex entry strings."""
+        return [self.entry(index) for index in range(num_entries)]
+
+    def library(self, num_entries):
+        """Contents of a bibtex file containing `num_entries` entries."""
+        return "\n\n".join(self.entries(num_entries)) + "\n"
+
+
+if __name__ == '__main__':
+    num_entries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    with open(sys.argv[1], 'w') as bibfile:
+        bibfile.write(LibraryGenerator().library(num_entries))
@@ -0,0 +1,31 @@
+"""
+Test reading citations from LaTeX auxiliary files
+"""
+
+import pytest
+
+from zotero_bibtize.auxfile import key_candidates, read_citations
+
+
+def test_read_citations(tempfolder):
+    main = tempfolder / 'thesis.aux'
+    main.write_text(
+        "\\relax\n\\citation{Chen2014a,Lang2015}\n"
+        "\\@input{chapter1.aux}\n\\@input{missing.aux}\n"
+        "\\bibdata{library}\n")
+    (tempfolder / 'chapter1.aux').write_text(
+        "\\relax\n\\citation{Chen2014a}\n\\citation{ Rao2019 , Li2020}\n"
+        "\\abx@aux@cite{0}{Adams2001}\n\\@input{thesis.aux}\n")
+    assert read_citations(str(main)) == {
+        'Chen2014a', 'Lang2015', 'Rao2019', 'Li2020', 'Adams2001'}
+    # all entries cited
+    main.write_text("\\citation{*}\n\\citation{Lang2015}\n")
+    assert read_citations(str(main)) is None
+    with pytest.raises(OSError):
+        read_citations(str(tempfolder / 'missing.aux'))
+
+
+def test_key_candidates():
+    candidates = key_candidates(['Chen2014ab', 'lang_lithium_2015'])
+    assert candidates == {'Chen2014ab', 'Chen2014a', 'Chen2014',
+                          'lang_lithium_2015'}
@@ -0,0 +1,100 @@
+"""
+Test processing of many bibtex files
+"""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from zotero_bibtize import batch
+from zotero_bibtize.batch import (find_bibtex_files, output_files,
+                                  process_batch)
+
+
+process_file = batch.process_file
+
+
+def crash_on_broken_file(input_file, output_file, *args):
+    """Kill the worker process when processing the file of project b."""
+    project = os.path.basename(os.path.dirname(input_file))
+    if project == 'b':
+        os._exit(1)
+    if project == os.environ.get('SLOW_PROJECT'):
+        time.sleep(0.5)
+    return process_file(input_file, output_file, *args)
+
+
+def make_tree(root, zotero_testfile):
+    """Create a tree of projects each containing a bibtex file."""
+    contents = open(str(zotero_testfile), 'r').read()
+    paths = []
+    for project in ['a', 'b', 'c/d']:
+        path = root / project / 'library.bib'
+        path.parent.mkdir(parents=True)
+        path.write_text(contents)
+        paths.append(str(path))
+    (root / 'a' / '.library.bib.orig').write_text(contents)
+    (root / 'a' / 'notes.txt').write_text('no bibtex')
+    return paths
+
+
+def test_find_bibtex_files(tempfolder, zotero_testfile):
+    paths = make_tree(tempfolder, zotero_testfile)
+    assert find_bibtex_files(str(tempfolder)) == sorted(paths)
+    pattern = str(tempfolder / '*' / '*.bib')
+    assert find_bibtex_files(pattern) == sorted(paths[:2])
+
+
+def test_output_files(tempfolder):
+    inputs = [str(tempfolder / 'a' / 'x.bib'), str(tempfolder / 'b' / 'y.bib')]
+    assert output_files(inputs) == inputs
+    outputs = output_files(inputs, output_dir='out')
+    assert outputs == ['out/a/x.bib', 'out/b/y.bib']
+
+
+def test_process_batch(tempfolder, zotero_testfile, wanted_testfile):
+    paths = make_tree(tempfolder / 'in', zotero_testfile)
+    broken = tempfolder / 'in' / 'broken.bib'
+    broken.write_text('@article{broken,\n  title = {Unbalanced\n')
+    paths = find_bibtex_files(str(tempfolder / 'in'))
+    output_dir = tempfolder / 'out'
+    for workers in [1, 2]:
+        results = list(process_batch(paths, str(output_dir),
+                                     workers=workers))
+        assert [r.input_file for r in results] == paths
+        # failures are reported without stopping the batch
+        assert [r.failed for r in results] == [False, False, True, False]
+        assert 'Unbalanced' in results[2].error
+        # the second run does not change the outputs
+        assert [r.unchanged for r in results] == [workers == 2] * 2 + \
+            [False, workers == 2]
+        assert not (output_dir / 'broken.bib').exists()
+    wanted = open(str(wanted_testfile), 'r').read()
+    for project in ['a', 'b', 'c/d']:
+        output = output_dir / project / 'library.bib'
+        assert output.read_text() == wanted
+
+
+def test_process_batch_in_place(tempfolder, zotero_testfile, wanted_testfile):
+    paths = make_tree(tempfolder, zotero_testfile)
+    results = list(process_batch(paths))
+    assert all(r.num_entries == 1 for r in results)
+    for path in paths:
+        assert open(path, 'r').read() == open(str(wanted_testfile)).read()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason="patched function is not available in workers")
+@pytest.mark.parametrize('slow_project', ['', 'a'])
+def test_process_batch_broken_pool(tempfolder, zotero_testfile, monkeypatch,
+                                   slow_project):
+    paths = make_tree(tempfolder, zotero_testfile)
+    monkeypatch.setattr(batch, 'process_file', crash_on_broken_file)
+    # files still being processed when the worker dies are not blamed
+    monkeypatch.setenv('SLOW_PROJECT', slow_project)
+    results = list(process_batch(paths, str(tempfolder / 'out'), workers=2))
+    assert [r.input_file for r in results] == paths
+    assert [r.failed for r in results] == [False, True, False]
+    assert 'terminated abruptly' in results[1].error
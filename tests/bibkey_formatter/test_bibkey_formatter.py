@@ -135,3 +135,86 @@ def test_function_words_removal_for_journals():
     string_is_journal = key_formatter.remove_function_words(journal_string,
                                                             is_journal=True)
     assert string_is_journal == "Chemistry European Journal"
+
+
+def test_compiled_key_format():
+    """Test compiled key formats generate the same keys."""
+    from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+    fields = {
+        'author': 'Surname, Firstname and Other, Name',
+        'title': 'A title for the test',
+        'journal': 'Journal of Materials Chemistry A',
+        'year': '2020',
+    }
+    key_format = "pre_[author:2:capitalize]_[title:1:upper][journal:abbr]" \
+                 "[year:short]"
+    compiled = CompiledKeyFormat(key_format)
+    generated_key = compiled.generate_key(fields, entry_type='article')
+    assert generated_key == "pre_SurnameOther_TITLEJMCA20"
+    key_formatter = KeyFormatter(fields, entry_type='article')
+    assert key_formatter.generate_key(key_format) == generated_key
+    assert key_formatter.generate_key(compiled) == generated_key
+
+
+@pytest.mark.parametrize(('key_format', 'message'), [
+    ('', 'no valid format entries found'),
+    ('[unknown]', "unknown field 'unknown'"),
+    ('[author:3:unknown]', 'Unknown format action: unknown'),
+    ('[author:3x]', "invalid number of words '3x'"),
+    ('[journal:2]', 'cannot define the number of words'),
+    ('[year:medium]', 'unknown format argument medium for year'),
+])
+def test_compiled_key_format_validation(key_format, message):
+    """Test invalid key formats raise before any key is generated."""
+    from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+    with pytest.raises(Exception) as exception:
+        CompiledKeyFormat(key_format)
+    assert message in str(exception.value)
+
+
+def test_additional_function_words(tempfolder):
+    """Test loading and using additional lists of function words."""
+    from zotero_bibtize.bibkey_formatter import (CompiledKeyFormat,
+                                                 FUNCTION_WORDS,
+                                                 load_function_words)
+    word_file = tempfolder / 'german.txt'
+    word_file.write_text("# german function words\nder die das\nund ÜBER\n")
+    german_words = load_function_words(str(word_file))
+    assert german_words == frozenset(['der', 'die', 'das', 'und', 'über'])
+    fields = {'title': 'Die Segregation an der Korngrenze'}
+    key_format = CompiledKeyFormat('[title:2]')
+    assert key_format.generate_key(fields) == 'DieSegregation'
+    key_format = CompiledKeyFormat('[title:2]',
+                                   function_words=FUNCTION_WORDS | german_words)
+    assert key_format.generate_key(fields) == 'SegregationKorngrenze'
+
+
+def test_fragment_cache():
+    """Test bounded caching of formatted key fragments."""
+    import pickle
+    from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+    key_format = CompiledKeyFormat(
+        '[author:capitalize][journal:abbreviate][year]', cache_size=2)
+    fields = {'author': 'Chen, M.', 'journal': 'Physical Review B',
+              'year': '2014'}
+    assert key_format.generate_key(fields, 'article') == 'ChenPRB2014'
+    fields['year'] = '2015'
+    assert key_format.generate_key(fields, 'article') == 'ChenPRB2015'
+    fragment_cache = key_format.fragment_cache
+    assert (fragment_cache.hits, fragment_cache.misses) == (2, 2)
+    # the least recently used fragment is evicted
+    fields['author'] = 'Adams, S.'
+    assert key_format.generate_key(fields, 'article') == 'AdamsPRB2015'
+    assert list(fragment_cache.fragments) == [
+        ('author', 'Adams, S.', ('capitalize',)),
+        ('journal', 'Physical Review B', ('abbreviate',))]
+    # journals are ignored for books even if cached
+    assert key_format.generate_key(fields, 'book') == 'Adams2015'
+    # the cache size is kept when sent to worker processes
+    assert pickle.loads(pickle.dumps(key_format)).fragment_cache.max_size == 2
+    # caching can be disabled
+    key_format = CompiledKeyFormat('[author]', cache_size=0)
+    key_format.generate_key(fields)
+    key_format.generate_key(fields)
+    assert key_format.fragment_cache.fragments == {}
+    assert key_format.fragment_cache.misses == 2
@@ -208,3 +208,18 @@ def test_author_list_split_for_name_containing_and():
     authors = 'Ackland, G. J. and Bacon, D. J. and Calder, A. F.'
     key_formatter = KeyFormatter({'author': authors})
     assert key_formatter.generate_key(key_format) == 'Ackland'
+
+
+def test_author_name_forms():
+    """Test von parts, corporate and special char names are handled"""
+    key_format = '[author:2]'
+    authors = 'Ludwig van Beethoven and {Barnes and Noble}'
+    key_formatter = KeyFormatter({'author': authors})
+    assert key_formatter.generate_key(key_format) == 'vanBeethovenBarnesandNoble'
+    authors = r'Els\"{a}sser, Christian and Lang, Britta'
+    key_formatter = KeyFormatter({'author': authors})
+    assert key_formatter.generate_key(key_format) == 'ElsasserLang'
+    # others does not name an author
+    authors = 'Surname, Firstname and others'
+    key_formatter = KeyFormatter({'author': authors})
+    assert key_formatter.generate_key(key_format) == 'Surname'
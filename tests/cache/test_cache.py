@@ -0,0 +1,71 @@
+"""
+Test caching of parsed entries
+"""
+
+import json
+
+from zotero_bibtize.cache import EntryCache
+
+
+def write_library(path, zotero_testfile, num_entries):
+    """Write a library containing copies of the test entry with new keys."""
+    contents = open(str(zotero_testfile), 'r').read()
+    entries = [contents.replace('chen_high_2014', 'key{}'.format(i))
+               for i in range(num_entries)]
+    path.write_text("\n".join(entries))
+
+
+def test_cached_entries_match_parsed(tempfolder, zotero_testfile):
+    from zotero_bibtize import BibTexFile
+    library = tempfolder / 'library.bib'
+    write_library(library, zotero_testfile, 3)
+    cache_file = tempfolder / 'library.cache'
+    key_format = "[author:capitalize][year]"
+    # first run fills the cache
+    cache = EntryCache(str(cache_file))
+    first = BibTexFile(str(library), key_format=key_format, cache=cache)
+    cache.save()
+    assert (cache.hits, cache.misses) == (0, 3)
+    # second run reads all entries from the cache and resolves keys again
+    cache = EntryCache(str(cache_file))
+    second = BibTexFile(str(library), key_format=key_format, cache=cache)
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert list(map(str, second.entries)) == list(map(str, first.entries))
+    assert [e.key for e in second.entries] == ['Chen2014a', 'Chen2014b',
+                                               'Chen2014c']
+    # changed settings must not use the cached entries
+    cache = EntryCache(str(cache_file))
+    BibTexFile(str(library), key_format="[year]", cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_cache_eviction(tempfolder, zotero_testfile):
+    from zotero_bibtize import BibTexFile
+    library = tempfolder / 'library.bib'
+    cache_file = tempfolder / 'library.cache'
+    write_library(library, zotero_testfile, 4)
+    cache = EntryCache(str(cache_file))
+    BibTexFile(str(library), cache=cache)
+    cache.save()
+    assert len(cache.entries) == 4
+    # entries no longer present are evicted
+    write_library(library, zotero_testfile, 2)
+    cache = EntryCache(str(cache_file))
+    BibTexFile(str(library), cache=cache)
+    cache.save()
+    contents = json.loads(cache_file.read_text())
+    assert len(contents['entries']) == 2
+    # only the most recently used entries are kept if the cache is full
+    write_library(library, zotero_testfile, 4)
+    cache = EntryCache(str(cache_file), max_entries=3)
+    BibTexFile(str(library), cache=cache)
+    cache.save()
+    assert len(EntryCache(str(cache_file)).entries) == 3
+
+
+def test_invalid_cache_file_is_ignored(tempfolder):
+    cache_file = tempfolder / 'library.cache'
+    cache_file.write_text("no json")
+    assert EntryCache(str(cache_file)).entries == {}
+    cache_file.write_text(json.dumps({'version': -1, 'entries': {'a': 1}}))
+    assert EntryCache(str(cache_file)).entries == {}
@@ -50,6 +50,22 @@ def test_call_without_outfile(tempcwd, zotero_testfile, wanted_testfile,
     assert content_processed == content_wanted
 
 
+def test_rerun_keeps_unchanged_file(tempcwd, zotero_testfile, click_runner):
+    # setup working directory
+    shutil.copy(str(zotero_testfile), str(pathlib.Path('.')))
+    infile = zotero_testfile.absolute()
+    outfile = tempcwd / 'processed.bib'
+    result = click_runner.invoke(zotero_bibtize, [str(infile), str(outfile)])
+    assert result.exit_code == 0
+    assert "unchanged" not in result.output
+    # processing the same input again does not touch the output file
+    mtime = outfile.stat().st_mtime_ns
+    result = click_runner.invoke(zotero_bibtize, [str(infile), str(outfile)])
+    assert result.exit_code == 0
+    assert "unchanged" in result.output
+    assert outfile.stat().st_mtime_ns == mtime
+
+
 def test_call_with_outfile(tempcwd, zotero_testfile, wanted_testfile, 
                            click_runner):
     import shutil
@@ -80,3 +96,195 @@ def test_call_with_key_format(tempcwd, zotero_testfile, click_runner):
     assert result.exit_code == 0
     content_processed = open(str(outfile), 'r').read()
     assert "ChenSSI2014" in content_processed
+
+
+def test_call_with_function_words(tempcwd, zotero_testfile, click_runner):
+    import pathlib
+    infile = zotero_testfile.absolute()
+    outfile = tempcwd / 'processed.bib'
+    word_file = tempcwd / 'words.txt'
+    word_file.write_text("high capacity\n")
+    key_format = "[title:2:capitalize]"
+    args = [str(infile), str(outfile), "--key-format", key_format,
+            "--function-words", str(word_file)]
+    result = click_runner.invoke(zotero_bibtize, args)
+    assert result.exit_code == 0
+    content_processed = open(str(outfile), 'r').read()
+    assert "@article{AllsolidstateCuli2sli6ps5brin," in content_processed
+
+
+def test_call_with_jobs(tempcwd, zotero_testfile, wanted_testfile,
+                        click_runner):
+    infile = zotero_testfile.absolute()
+    outfile = tempcwd / 'processed.bib'
+    args = [str(infile), str(outfile), "--jobs", "2"]
+    result = click_runner.invoke(zotero_bibtize, args)
+    assert result.exit_code == 0
+    content_processed = open(str(outfile), 'r').read()
+    content_wanted = open(str(wanted_testfile), 'r').read()
+    assert content_processed == content_wanted
+
+
+def test_call_with_cache(tempcwd, zotero_testfile, wanted_testfile,
+                         click_runner):
+    import shutil
+    import pathlib
+    shutil.copy(str(zotero_testfile), str(pathlib.Path('.')))
+    infile = tempcwd / zotero_testfile.name
+    outfile = tempcwd / 'processed.bib'
+    for _ in range(2):  # second run uses the cached entries
+        result = click_runner.invoke(zotero_bibtize, [str(infile), 
+                                                      str(outfile), "--cache"])
+        assert result.exit_code == 0
+        content_processed = open(str(outfile), 'r').read()
+        content_wanted = open(str(wanted_testfile), 'r').read()
+        assert content_processed == content_wanted
+    assert (tempcwd / '.{}.cache'.format(zotero_testfile.name)).exists()
+
+
+def test_call_watch_requires_output_file(tempcwd, zotero_testfile,
+                                         click_runner):
+    import shutil
+    import pathlib
+    shutil.copy(str(zotero_testfile), str(pathlib.Path('.')))
+    infile = tempcwd / zotero_testfile.name
+    result = click_runner.invoke(zotero_bibtize, [str(infile), "--watch"])
+    assert result.exit_code != 0
+    # statistics and profiles are not collected in watch mode
+    for option in (["--stats"], ["--profile", "watch.prof"]):
+        result = click_runner.invoke(zotero_bibtize, [str(infile), "out.bib",
+                                                      "--watch"] + option)
+        assert result.exit_code == 2
+        assert "can not be used in watch mode" in result.output
+
+
+def test_call_batch(tempcwd, zotero_testfile, wanted_testfile, click_runner):
+    import shutil
+    for project in ['a', 'b']:
+        (tempcwd / project).mkdir()
+        shutil.copy(str(zotero_testfile), str(tempcwd / project))
+    result = click_runner.invoke(zotero_bibtize, ["--batch", "[ab]/*.bib",
+                                                  "--output-dir", "out"])
+    assert result.exit_code == 0
+    assert "Processed 2 files (0 failed)" in result.output
+    for project in ['a', 'b']:
+        output = tempcwd / 'out' / project / zotero_testfile.name
+        assert output.read_text() == open(str(wanted_testfile)).read()
+    # failures are summarized and reported by the exit code
+    (tempcwd / 'a' / 'broken.bib').write_text('@article{broken,\n')
+    result = click_runner.invoke(zotero_bibtize, ["--batch", "[ab]/*.bib",
+                                                  "--output-dir", "out"])
+    assert result.exit_code == 1
+    assert "Processed 3 files (1 failed)" in result.output
+    # options which are not supported in batch mode are rejected
+    for option in (["--cache"], ["--watch"], ["--stats"], ["--aux", "a.aux"],
+                   ["--profile", "batch.prof"], ["--format", "jsonl"]):
+        (tempcwd / 'a.aux').write_text('\\citation{a}\n')
+        result = click_runner.invoke(zotero_bibtize, ["--batch", "[ab]/*.bib"]
+                                     + option)
+        assert result.exit_code == 2
+        assert "can not be used in batch mode" in result.output
+
+
+def test_call_with_stats_and_profile(tempcwd, zotero_testfile, click_runner):
+    import pstats
+    outfile = tempcwd / 'processed.bib'
+    profile = tempcwd / 'run.prof'
+    result = click_runner.invoke(zotero_bibtize, [str(zotero_testfile),
+                                                  str(outfile), "--stats",
+                                                  "--profile", str(profile)])
+    assert result.exit_code == 0
+    for phase in ['read', 'split', 'unescape', 'fields', 'write', 'total']:
+        assert phase in result.output
+    assert 'chen_high_2014' in result.output
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def test_call_with_stable_keys(tempcwd, zotero_testfile, click_runner):
+    infile = tempcwd / 'library.bib'
+    outfile = tempcwd / 'processed.bib'
+    contents = open(str(zotero_testfile), 'r').read()
+    infile.write_text(contents)
+    options = [str(infile), str(outfile), "--stable-keys",
+               "--key-format", "[author:capitalize][year]"]
+    result = click_runner.invoke(zotero_bibtize, options)
+    assert result.exit_code == 0
+    assert '@article{Chen2014,' in outfile.read_text()
+    # the existing entry keeps its key when a colliding entry is added
+    infile.write_text(contents.replace('10.1016/j.ssi.2013.10.057', 'other')
+                      + contents)
+    result = click_runner.invoke(zotero_bibtize, options)
+    assert result.exit_code == 0
+    output = outfile.read_text()
+    assert '@article{Chen2014a,' in output
+    assert '@article{Chen2014,' in output
+    assert (tempcwd / '.library.bib.keys').exists()
+
+
+def test_call_with_keep_fields(tempcwd, zotero_testfile, click_runner):
+    outfile = tempcwd / 'processed.bib'
+    result = click_runner.invoke(zotero_bibtize, [str(zotero_testfile),
+                                                  str(outfile),
+                                                  "--keep-fields",
+                                                  "author,year,doi"])
+    assert result.exit_code == 0
+    assert outfile.read_text() == (
+        "@article{chen_high_2014,\n"
+        "    doi = {10.1016/j.ssi.2013.10.057},\n"
+        "    author = {Chen, M. and Rao, Rayavarapu Prasada and Adams, S.},\n"
+        "    year = {2014}\n}\n")
+
+
+def test_call_with_aux(tempcwd, zotero_testfile, click_runner):
+    infile = tempcwd / 'library.bib'
+    outfile = tempcwd / 'processed.bib'
+    contents = open(str(zotero_testfile), 'r').read()
+    infile.write_text(contents + contents.replace('chen_high_2014', 'other'))
+    auxfile = tempcwd / 'thesis.aux'
+    auxfile.write_text("\\relax\n\\citation{other,missing}\n")
+    result = click_runner.invoke(zotero_bibtize, [str(infile), str(outfile),
+                                                  "--aux", str(auxfile)])
+    assert result.exit_code == 0
+    assert "Cited entries not found: missing" in result.output
+    output = outfile.read_text()
+    assert '@article{other,' in output
+    assert 'chen_high_2014' not in output
+
+
+def test_call_with_format(tempcwd, zotero_testfile, click_runner):
+    from zotero_bibtize.formats import iter_jsonl_entries
+    outfile = tempcwd / 'processed.jsonl'
+    result = click_runner.invoke(zotero_bibtize, [str(zotero_testfile),
+                                                  str(outfile),
+                                                  "--format", "jsonl"])
+    assert result.exit_code == 0
+    entries = list(iter_jsonl_entries(str(outfile)))
+    assert [e.key for e in entries] == ['chen_high_2014']
+    # the input file must not be overwritten by other formats
+    shutil.copy(str(zotero_testfile), str(pathlib.Path('.')))
+    result = click_runner.invoke(zotero_bibtize, ["--format", "csl-json"])
+    assert result.exit_code != 0
+    assert "requires an output file" in str(result.exception)
+
+
+def test_startup_import_budget():
+    import subprocess
+    import sys
+    # import the command line interface in a fresh interpreter and collect
+    # the self times (in us) of the imported modules
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import zotero_bibtize.cli'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        (self_time, _, module) = line[len('import time:'):].split('|')
+        import_times[module.strip()] = int(self_time)
+    assert 'zotero_bibtize.cli' in import_times
+    # the parser and the process pool are only loaded when processing files
+    assert 'zotero_bibtize.zotero_bibtize' not in import_times
+    assert 'concurrent.futures' not in import_times
+    package_time = sum(time for (module, time) in import_times.items()
+                       if module.split('.')[0] == 'zotero_bibtize')
+    assert package_time < 25000
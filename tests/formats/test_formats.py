@@ -0,0 +1,65 @@
+"""
+Test JSON Lines and CSL-JSON output formats
+"""
+
+import json
+
+import pytest
+
+from zotero_bibtize.formats import (csl_item, iter_csl_items,
+                                    iter_jsonl_entries, serialize_entries)
+from zotero_bibtize.writer import write_entries
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+ENTRY = ("@article{key,\n  title = {Lithium {Ion} Conduction in "
+         "{\\textbackslash}ce\\{{LiTi}2\\}},\n  journal = {Chem. Mater.},\n"
+         "  author = {Lang, Britta and van Hove, L. and {Barnes and Noble}},\n"
+         "  month = jul,\n  year = {2015},\n  pages = {5040--5048},\n"
+         "  doi = {10.1021/acs.chemmater.5b01582},\n  urldate = {2019-02-11}\n}")
+
+
+def test_jsonl_roundtrip(tempfolder):
+    entries = [BibEntry(ENTRY), BibEntry("@misc{Müller2020,\n  note = {}\n}")]
+    jsonl_file = tempfolder / 'library.jsonl'
+    write_entries(serialize_entries(entries, 'jsonl'), str(jsonl_file))
+    lines = jsonl_file.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1]) == {'type': 'misc', 'key': 'Müller2020',
+                                    'fields': {'note': None}}
+    loaded = list(iter_jsonl_entries(str(jsonl_file)))
+    assert [str(e) for e in loaded] == [str(e) for e in entries]
+
+
+def test_csl_item():
+    item = csl_item(BibEntry(ENTRY))
+    assert item == {
+        'id': 'key',
+        'type': 'article-journal',
+        'title': 'Lithium Ion Conduction in \\ce{LiTi2}',
+        'container-title': 'Chem. Mater.',
+        'author': [{'family': 'Lang', 'given': 'Britta'},
+                   {'family': 'Hove', 'given': 'L.',
+                    'non-dropping-particle': 'van'},
+                   {'literal': 'Barnes and Noble'}],
+        'issued': {'date-parts': [[2015, 7]]},
+        'page': '5040-5048',
+        'DOI': '10.1021/acs.chemmater.5b01582',
+    }
+
+
+def test_csl_json_stream(tempfolder):
+    entries = [BibEntry(ENTRY), BibEntry("@book{other,\n  year = {2001}\n}")]
+    csl_file = tempfolder / 'library.json'
+    write_entries(serialize_entries(entries, 'csl-json'), str(csl_file))
+    items = json.loads(csl_file.read_text())
+    assert [item['id'] for item in items] == ['key', 'other']
+    assert list(iter_csl_items(str(csl_file))) == items
+    # empty and other (pretty-printed) CSL-JSON files
+    write_entries(serialize_entries([], 'csl-json'), str(csl_file))
+    assert list(iter_csl_items(str(csl_file))) == []
+    csl_file.write_text(json.dumps(items, indent=2))
+    assert list(iter_csl_items(str(csl_file))) == items
+    with pytest.raises(Exception) as exception:
+        serialize_entries(entries, 'ris')
+    assert "unknown output format 'ris'" in str(exception.value)
@@ -0,0 +1,63 @@
+"""
+Test suite for the BibTeX name list parser
+"""
+
+import pytest
+
+from zotero_bibtize.names import (Name, is_lowercase, parse_name, parse_names,
+                                  split_names)
+
+
+def test_split_names():
+    """Test name lists are only split at `and` outside of braces."""
+    names = 'Barnes, A. and {Barnes and Noble} AND Alexandra Sandy and  Li, W.'
+    assert split_names(names) == ['Barnes, A.', '{Barnes and Noble}',
+                                  'Alexandra Sandy', 'Li, W.']
+    assert split_names(names, max_names=2) == ['Barnes, A.',
+                                               '{Barnes and Noble}']
+    assert split_names('') == []
+    # escaped braces do not change the brace level
+    assert split_names(r'A\{x and B') == [r'A\{x', 'B']
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('Knuth', Name('', '', 'Knuth', '')),
+    ('Donald E. Knuth', Name('Donald E.', '', 'Knuth', '')),
+    ('Ludwig van Beethoven', Name('Ludwig', 'van', 'Beethoven', '')),
+    ('Jean de la Fontaine', Name('Jean', 'de la', 'Fontaine', '')),
+    ('de la Fontaine, Jean', Name('Jean', 'de la', 'Fontaine', '')),
+    ('Van Hove, L.', Name('L.', '', 'Van Hove', '')),
+    ('van Beethoven, Jr, Ludwig', Name('Ludwig', 'van', 'Beethoven', 'Jr')),
+    ('{Barnes and Noble}', Name('', '', '{Barnes and Noble}', '')),
+    (r'Els\"{a}sser, Christian', Name('Christian', '', r'Els\"{a}sser', '')),
+    (r'Charles de la Vall{\'e}e~Poussin',
+     Name('Charles', 'de la', r'Vall{\'e}e Poussin', '')),
+])
+def test_parse_name(name, expected):
+    """Test the First von Last, von Last, First and von Last, Jr, First forms"""
+    assert parse_name(name) == expected
+
+
+def test_is_lowercase():
+    """Test the case of words with braces and special chars."""
+    assert is_lowercase('van')
+    assert not is_lowercase('Van')
+    assert not is_lowercase('{van}')
+    assert is_lowercase(r'{\"u}ber')
+    assert not is_lowercase(r'{\"U}ber')
+    assert is_lowercase(r'{\o}rsted')
+    assert not is_lowercase(r'{\AE}sop')
+    assert is_lowercase('2nd')
+    assert not is_lowercase('{}')
+
+
+def test_parsed_names_are_cached():
+    """Test recurring names are only parsed once."""
+    parse_name.cache_clear()
+    first = parse_names('Chen, M. and Rao, A.')
+    second = parse_names('Rao, A. and Chen, M. and Li, W.')
+    assert second[0] is first[1]
+    assert second[1] is first[0]
+    cache_info = parse_name.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (2, 3)
+    assert str(second[2]) == 'Li, W.'
@@ -0,0 +1,36 @@
+"""
+Test the registry of assigned keys
+"""
+
+from zotero_bibtize.registry import KeyRegistry, entry_identity
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+
+def test_entry_identity():
+    entry = "@article{{key,\n  title = {{A title}},\n{}  year = {{2020}}\n}}"
+    with_doi = BibEntry(entry.format("  doi = {10.1000/ABC},\n"))
+    # identity does not depend on the key and ignores the case of DOIs
+    other = BibEntry(entry.replace('key', 'other')
+                     .format("  doi = {10.1000/abc},\n"))
+    assert entry_identity(with_doi) == entry_identity(other)
+    # without DOI the identity is derived from the contents
+    without_doi = BibEntry(entry.format(""))
+    changed = BibEntry(entry.replace('2020', '2021').format(""))
+    assert entry_identity(without_doi) != entry_identity(changed)
+    assert entry_identity(without_doi) != entry_identity(with_doi)
+
+
+def test_registry_file(tempfolder):
+    registry_file = tempfolder / 'library.keys'
+    registry = KeyRegistry(str(registry_file))
+    assert registry.get('identity') == []
+    registry.register('identity', 'Chen2014a')
+    registry.register('identity', 'Chen2014b')
+    registry.register('identity', 'Chen2014a')
+    registry.save()
+    registry = KeyRegistry(str(registry_file))
+    assert registry.get('identity') == ['Chen2014a', 'Chen2014b']
+    assert registry.is_registered('Chen2014b')
+    # invalid files are ignored
+    registry_file.write_text('invalid')
+    assert KeyRegistry(str(registry_file)).keys == {}
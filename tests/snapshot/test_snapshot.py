@@ -0,0 +1,84 @@
+"""
+Test binary snapshots of parsed bibliographies
+"""
+
+import os
+
+import pytest
+
+from zotero_bibtize import BibTexFile
+
+
+def write_library(path):
+    entry = ("@article{{key{0},\n  author = {{Müller, M.}},\n"
+             "  title = {{{{\\textbackslash}}ce\\{{{{Li2S}}\\}} Phases}},\n"
+             "  year = {{2014}},\n  month = jul,\n  doi = {{{0}}}\n}}\n\n")
+    path.write_text("".join(entry.format(doi) for doi in ['1', '2', '3']))
+
+
+def test_snapshot_roundtrip(tempfolder):
+    library = tempfolder / 'library.bib'
+    snapshot = tempfolder / 'library.snapshot'
+    write_library(library)
+    bibliography = BibTexFile(str(library), key_format="[author][year]")
+    bibliography.entries[0].fields['note'] = None
+    bibliography.save_snapshot(str(snapshot))
+    loaded = BibTexFile.load_snapshot(str(snapshot))
+    assert loaded.bibtex_file == str(library)
+    assert [str(e) for e in loaded.entries] == \
+        [str(e) for e in bibliography.entries]
+    assert [e.key for e in loaded.entries] == ['Müller2014a', 'Müller2014b',
+                                               'Müller2014c']
+    assert loaded.entries[0].fields['note'] is None
+    assert loaded.entries[0].fields['title'] == r'\ce{Li2S} Phases'
+    assert dict(loaded.key_map) == {'Müller2014': [0, 1, 2]}
+    assert loaded.by_doi('2').key == 'Müller2014b'
+
+
+def test_outdated_snapshot(tempfolder):
+    library = tempfolder / 'library.bib'
+    snapshot = tempfolder / 'library.snapshot'
+    write_library(library)
+    BibTexFile(str(library)).save_snapshot(str(snapshot))
+    # touching the file without changing its contents keeps the snapshot
+    contents = library.read_text()
+    library.write_text(contents)
+    os.utime(str(library), ns=(0, 0))
+    assert len(BibTexFile.load_snapshot(str(snapshot)).entries) == 3
+    library.write_text(contents.replace('jul', 'aug'))
+    with pytest.raises(Exception) as exception:
+        BibTexFile.load_snapshot(str(snapshot))
+    assert "is outdated" in str(exception.value)
+    loaded = BibTexFile.load_snapshot(str(snapshot), validate=False)
+    assert loaded.entries[0].fields['month'] == 'jul'
+    # snapshots are validated against the given bibtex file
+    other = tempfolder / 'other.bib'
+    other.write_text(contents)
+    loaded = BibTexFile.load_snapshot(str(snapshot), str(other))
+    assert loaded.bibtex_file == str(other)
+
+
+def test_snapshot_of_parsed_contents(tempfolder):
+    from zotero_bibtize.snapshot import source_signature
+    library = tempfolder / 'library.bib'
+    snapshot = tempfolder / 'library.snapshot'
+    library.write_text("@article{a,\n  year = {2014}\n}\n")
+    bibliography = BibTexFile(str(library))
+    assert bibliography.source_signature == source_signature(str(library))
+    # the snapshot is outdated if the file changed after it was parsed
+    with open(str(library), 'a') as bibfile:
+        bibfile.write("@article{b,\n  year = {2015}\n}\n")
+    bibliography.save_snapshot(str(snapshot))
+    with pytest.raises(Exception) as exception:
+        BibTexFile.load_snapshot(str(snapshot), validate=True)
+    assert "is outdated" in str(exception.value)
+    loaded = BibTexFile.load_snapshot(str(snapshot), validate=False)
+    assert [e.key for e in loaded.entries] == ['a']
+
+
+def test_invalid_snapshot(tempfolder):
+    snapshot = tempfolder / 'library.snapshot'
+    snapshot.write_bytes(b'@article{key,\n  year = {2014}\n}\n' * 4)
+    with pytest.raises(Exception) as exception:
+        BibTexFile.load_snapshot(str(snapshot))
+    assert "Invalid snapshot file" in str(exception.value)
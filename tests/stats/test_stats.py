@@ -0,0 +1,45 @@
+"""
+Test collection of run statistics
+"""
+
+from zotero_bibtize.stats import NULL_STATS, Stats
+
+
+def test_nested_phases_are_exclusive(monkeypatch):
+    clock = iter([0.0, 1.0, 3.0, 4.0, 7.0])
+    monkeypatch.setattr('zotero_bibtize.stats.time.perf_counter',
+                        lambda: next(clock))
+    stats = Stats()
+    with stats.phase('outer'):
+        with stats.phase('inner'):
+            pass
+    assert stats.times == {'outer': 2.0 + 3.0, 'inner': 1.0}
+
+
+def test_slowest_entries():
+    stats = Stats(num_slowest=2)
+    for (index, seconds) in enumerate([0.1, 0.5, 0.2, 0.4]):
+        stats.add_entry(index, 'key{}'.format(index), seconds)
+    assert stats.slowest_entries() == [(0.5, 1, 'key1'), (0.4, 3, 'key3')]
+
+
+def test_bibtex_file_stats(zotero_testfile):
+    from zotero_bibtize import BibTexFile
+    stats = Stats()
+    BibTexFile(str(zotero_testfile), key_format="[author][year]", stats=stats)
+    assert list(stats.times) == ['split', 'read', 'unescape', 'fields',
+                                 'keys', 'resolve keys']
+    assert stats.counts == {'bytes': zotero_testfile.stat().st_size,
+                            'entries': 1, 'fields': 10,
+                            'key fragment hits': 0,
+                            'key fragment misses': 1}
+    assert [(i, k) for (_, i, k) in stats.slowest] == [(0, 'Chen2014')]
+    assert 'Chen2014' in stats.report()
+
+
+def test_null_stats():
+    assert not NULL_STATS.enabled
+    items = [1, 2]
+    assert NULL_STATS.timed_iter(items, 'phase') is items
+    with NULL_STATS.phase('phase'):
+        NULL_STATS.add_entry(0, 'key', 1.0)
@@ -0,0 +1,119 @@
+"""
+Test watching bibtex files for changes
+"""
+
+import pytest
+
+from zotero_bibtize.watch import BibTexWatcher
+
+
+@pytest.fixture
+def watcher(tempfolder, zotero_testfile):
+    library = tempfolder / 'library.bib'
+    library.write_text(open(str(zotero_testfile), 'r').read())
+    watcher = BibTexWatcher(str(library), str(tempfolder / 'out.bib'),
+                            debounce=1.0)
+    watcher.now = 0.0
+    watcher.clock = lambda: watcher.now
+    return watcher
+
+
+def test_watch_same_file(tempfolder):
+    library = str(tempfolder / 'library.bib')
+    with pytest.raises(Exception):
+        BibTexWatcher(library, library)
+
+
+def test_watch_debounce(watcher, tempfolder, wanted_testfile):
+    outfile = tempfolder / 'out.bib'
+    # change detected but the file has to remain unchanged for a while
+    assert watcher.poll() is None
+    watcher.now = 0.5
+    assert watcher.poll() is None
+    assert not outfile.exists()
+    watcher.now = 1.0
+    assert watcher.poll() is not None
+    assert outfile.read_text() == open(str(wanted_testfile), 'r').read()
+    assert (watcher.cache.hits, watcher.cache.misses) == (0, 1)
+    # nothing to do if the file was not changed
+    watcher.now = 5.0
+    assert watcher.poll() is None
+
+
+def test_watch_reuses_parsed_entries(watcher, tempfolder):
+    library = tempfolder / 'library.bib'
+    watcher.poll()
+    watcher.now = 1.0
+    watcher.poll()
+    # append a copy of the entry with a new key
+    contents = library.read_text()
+    library.write_text(contents + contents.replace('chen_high_2014', 'new'))
+    watcher.now = 2.0
+    assert watcher.poll() is None
+    watcher.now = 3.0
+    bibliography = watcher.poll()
+    assert [e.key for e in bibliography.entries] == ['chen_high_2014', 'new']
+    assert (watcher.cache.hits, watcher.cache.misses) == (1, 2)
+
+
+def test_watch_incomplete_file(watcher, tempfolder):
+    library = tempfolder / 'library.bib'
+    contents = library.read_text()
+    library.write_text(contents[:len(contents) // 2])
+    watcher.poll()
+    watcher.now = 1.0
+    assert watcher.poll() is None
+    assert not (tempfolder / 'out.bib').exists()
+    # processed once the file was written completely
+    library.write_text(contents)
+    watcher.poll()
+    watcher.now = 2.0
+    assert watcher.poll() is not None
+
+
+def test_watch_failed_processing(watcher, tempfolder):
+    library = tempfolder / 'library.bib'
+    process = watcher.process
+    def failing_process():
+        raise RuntimeError('failed to process')
+    watcher.process = failing_process
+    watcher.poll()
+    watcher.now = 1.0
+    with pytest.raises(RuntimeError):
+        watcher.poll()
+    # the same broken file is not processed again
+    watcher.process = process
+    watcher.now = 5.0
+    assert watcher.poll() is None
+    # but once it was modified
+    library.write_text(library.read_text() + '\n')
+    watcher.poll()
+    watcher.now = 6.0
+    assert watcher.poll() is not None
+    assert (tempfolder / 'out.bib').exists()
+
+
+def test_watch_run_continues_after_errors(watcher, tempfolder, monkeypatch):
+    library = tempfolder / 'library.bib'
+    contents = library.read_text()
+    process = watcher.process
+    calls = []
+    def failing_once():
+        calls.append(watcher.now)
+        if len(calls) == 1:
+            raise RuntimeError('failed to process')
+        return process()
+    def sleep(interval):
+        watcher.now += 1.0
+        if watcher.now == 3.0:  # fix the file after the failed run
+            library.write_text(contents + '\n')
+        if watcher.now > 6.0:
+            raise KeyboardInterrupt()
+    monkeypatch.setattr('zotero_bibtize.watch.time.sleep', sleep)
+    watcher.process = failing_once
+    errors, processed = [], []
+    watcher.run(callback=processed.append, error_callback=errors.append)
+    assert [str(error) for error in errors] == ['failed to process']
+    assert calls == [1.0, 4.0]
+    assert len(processed) == 1
+    assert (tempfolder / 'out.bib').exists()
@@ -0,0 +1,96 @@
+"""
+Test atomic writing of output files
+"""
+
+import os
+import stat
+
+import pytest
+
+from zotero_bibtize.writer import AtomicFile, _umask, write_entries
+
+
+def test_write_entries(tempfolder):
+    output_file = tempfolder / 'output.bib'
+    write_entries(['entry1\n', 'entry2\n'], str(output_file))
+    assert output_file.read_text() == 'entry1\nentry2\n'
+    # no temporary files should be left behind
+    assert os.listdir(str(tempfolder)) == ['output.bib']
+
+
+def test_write_entries_keeps_permissions(tempfolder):
+    output_file = tempfolder / 'output.bib'
+    output_file.write_text('old contents')
+    os.chmod(str(output_file), 0o640)
+    write_entries(['new contents'], str(output_file))
+    assert output_file.read_text() == 'new contents'
+    assert stat.S_IMODE(os.stat(str(output_file)).st_mode) == 0o640
+
+
+def test_interrupted_write_keeps_original(tempfolder):
+    output_file = tempfolder / 'output.bib'
+    output_file.write_text('old contents')
+    def failing_serializer(entry):
+        if entry == 'fail':
+            raise RuntimeError('failed to serialize entry')
+        return entry
+    with pytest.raises(RuntimeError):
+        write_entries(['new', 'fail'], str(output_file),
+                      serialize=failing_serializer)
+    assert output_file.read_text() == 'old contents'
+    assert os.listdir(str(tempfolder)) == ['output.bib']
+
+
+def test_unchanged_output_is_kept(tempfolder):
+    output_file = tempfolder / 'output.bib'
+    backup_file = tempfolder / '.output.bib.orig'
+    output_file.write_text('entry1\nentry2\n')
+    os.utime(str(output_file), ns=(0, 0))
+    written = write_entries(['entry1\n', 'entry2\n'], str(output_file),
+                            backup_file=str(backup_file))
+    assert not written
+    # the file is neither touched nor backed up
+    assert os.stat(str(output_file)).st_mtime_ns == 0
+    assert os.listdir(str(tempfolder)) == ['output.bib']
+    # changed contents are written and the previous contents backed up
+    written = write_entries(['entry1\n'], str(output_file),
+                            backup_file=str(backup_file))
+    assert written
+    assert output_file.read_text() == 'entry1\n'
+    assert backup_file.read_text() == 'entry1\nentry2\n'
+    # unless disabled the contents are always written
+    os.utime(str(output_file), ns=(0, 0))
+    assert write_entries(['entry1\n'], str(output_file), skip_unchanged=False)
+    assert os.stat(str(output_file)).st_mtime_ns != 0
+
+
+def test_new_file_permissions(tempfolder):
+    output_file = tempfolder / 'output.bib'
+    umask = os.umask(0o027)
+    try:
+        _umask.cache_clear()
+        write_entries(['entry1\n'], str(output_file))
+    finally:
+        os.umask(umask)
+        _umask.cache_clear()
+    # new files get the default mode instead of the temp file mode 0o600
+    assert stat.S_IMODE(os.stat(str(output_file)).st_mode) == 0o640
+
+
+def test_atomic_file(tempfolder):
+    output_file = tempfolder / 'output.bin'
+    output_file.write_bytes(b'old')
+    os.chmod(str(output_file), 0o640)
+    # contents are discarded unless committed
+    with pytest.raises(RuntimeError):
+        with AtomicFile(str(output_file)) as atomic:
+            atomic.raw.write(b'new')
+            raise RuntimeError('failed to write')
+    assert output_file.read_bytes() == b'old'
+    assert os.listdir(str(tempfolder)) == ['output.bin']
+    with AtomicFile(str(output_file)) as atomic:
+        atomic.raw.write(b'new')
+        atomic.commit()
+    assert output_file.read_bytes() == b'new'
+    assert stat.S_IMODE(os.stat(str(output_file)).st_mode) == 0o640
+    assert os.listdir(str(tempfolder)) == ['output.bin']
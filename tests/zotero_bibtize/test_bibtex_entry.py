@@ -271,3 +271,124 @@ def test_splitting_for_containing_termination_sequence():
     )
     input_entry = "\n".join(input_entry)
     bibentry = BibEntry(input_entry)
+
+
+def test_tokenize_entry_content(empty_bibentry):
+    entry_content = (
+        "bibkey,\n"
+        "   field1 = {Contents, with {nested, commas} = and equal signs},\n"
+        "   field2 = \"quoted, contents\",\n"
+        "   month = jul,\n"
+        "   field3 = {},\n"
+    )
+    key, fields = empty_bibentry.tokenize_entry_content(entry_content)
+    assert key == "bibkey"
+    assert fields == [
+        ("field1", "Contents, with {nested, commas} = and equal signs"),
+        ("field2", "\"quoted, contents\""),
+        ("month", "jul"),
+        ("field3", None),
+    ]
+
+
+def test_unescape_matches_successive_unescaping(empty_bibentry):
+    """
+    Differential test comparing the single pass unescaping against the
+    successive removal of Zotero escapes, special char escapes and braces
+    around capitalized words for a large generated corpus.
+    """
+    import random
+    from zotero_bibtize.zotero_bibtize import _UNESCAPE_MAP
+    atoms = list(_UNESCAPE_MAP) + [
+        "{", "}", "\\", " ", ",", "_", "#", "$", "1", "x", "Z", "word", "é",
+        "{Word}", "{Word2}", "{A}", "{É}", "{word}", "{Word\\_Two}",
+    ]
+    rng = random.Random(42)
+    for _ in range(20000):
+        num_atoms = rng.randint(1, 12)
+        entry = "".join(rng.choice(atoms) for _ in range(num_atoms))
+        wanted = empty_bibentry.remove_zotero_escaping(entry)
+        wanted = empty_bibentry.remove_special_char_escaping(wanted)
+        wanted = empty_bibentry.remove_curly_from_capitalized(wanted)
+        assert empty_bibentry.unescape_bibtex_entry_string(entry) == wanted
+
+
+def test_compact_entry_representation():
+    from zotero_bibtize.zotero_bibtize import BibEntry
+    input_entry = "@article{key,\n  title = {A title},\n  year = {2020}\n}"
+    first = BibEntry(input_entry, omit_fields="year")
+    second = BibEntry(input_entry, omit_fields="year")
+    assert not hasattr(first, '__dict__')
+    # the raw entry string is only kept on request
+    assert first.raw is None
+    assert BibEntry(input_entry, keep_raw=True).raw == input_entry
+    # omitted fields are shared between entries
+    assert first.fields_to_omit == frozenset(["year"])
+    assert first.fields_to_omit is second.fields_to_omit
+    assert list(first.fields.items()) == [('title', 'A title')]
+
+
+def test_lazy_fields_match_eager_fields():
+    """Differential test comparing lazily and eagerly decoded entries."""
+    import random
+    from zotero_bibtize.zotero_bibtize import BibEntry, LazyFields
+    atoms = [
+        r"{\textbar}", r"{\textless}", r"{\textasciitilde}", r"\#", r"\%",
+        r"\&", r"\$", r"\_", r"{\textbackslash}ce\{{H2O}\}", r"\{x\}",
+        r"\{\vphantom{\}}x\vphantom{\{}\}", "{Word}", "{A}", "{word}",
+        "word", " ", ",", "=", '"', "1", "é",
+    ]
+    rng = random.Random(7)
+    for _ in range(2000):
+        fields = []
+        for label in ['title', 'author', 'journal', 'abstract']:
+            content = "x" + "".join(rng.choice(atoms)
+                              for _ in range(rng.randint(0, 8)))
+            fields.append("  {} = {{{}}}".format(label, content))
+        entry = "@article{{key_{},\n{}\n}}".format(rng.randint(0, 9),
+                                                   ",\n".join(fields))
+        eager = BibEntry(entry, key_format="[author][title][journal]")
+        lazy = BibEntry(entry, key_format="[author][title][journal]",
+                        lazy=True)
+        assert isinstance(lazy.fields, LazyFields)
+        assert (lazy.type, lazy.key) == (eager.type, eager.key)
+        assert dict(lazy.fields) == dict(eager.fields)
+        assert str(lazy) == str(eager)
+
+
+def test_lazy_fields_decode_on_access():
+    from zotero_bibtize.zotero_bibtize import BibEntry
+    input_entry = ("@article{key,\n  title = {A {Title}},\n"
+                   "  abstract = {\\{unbalanced},\n  year = {2020},\n}")
+    bibentry = BibEntry(input_entry, lazy=True, omit_fields="year")
+    assert list(bibentry.fields) == ['title', 'abstract']
+    assert bibentry.fields['title'] == 'A Title'
+    # errors of fields are only raised when they are decoded
+    with pytest.raises(Exception):
+        bibentry.fields['abstract']
+    bibentry.fields['abstract'] = 'replaced'
+    del bibentry.fields['title']
+    assert str(bibentry) == "@article{key,\n    abstract = {replaced}\n}\n"
+
+
+def test_keep_fields():
+    from zotero_bibtize.zotero_bibtize import BibEntry
+    input_entry = ("@article{key,\n  title = {A {Title}},\n"
+                   "  author = {Chen, M.},\n  abstract = {\\{unbalanced},\n"
+                   "  year = {2020}\n}")
+    for lazy in [False, True]:
+        bibentry = BibEntry(input_entry, key_format="[author][year]",
+                            keep_fields="year,title", lazy=lazy)
+        # fields are kept in the input order, removed fields are still used
+        # for the key and never decoded
+        assert list(bibentry.fields.items()) == [('title', 'A Title'),
+                                                 ('year', '2020')]
+        assert bibentry.key == 'Chen2020'
+        bibentry = BibEntry(input_entry, keep_fields="year,title,abstract",
+                            omit_fields="abstract,year", lazy=lazy)
+        assert list(bibentry.fields) == ['title']
+    # omitted fields are not decoded either
+    bibentry = BibEntry(input_entry, omit_fields="abstract")
+    assert list(bibentry.fields) == ['title', 'author', 'year']
+    with pytest.raises(Exception):
+        BibEntry(input_entry)
@@ -11,6 +11,11 @@ def test_num_to_char_mapping(empty_bibtexfile):
     char_testlist = enumerate(single_chars + multi_chars)
     for (index, wanted_char) in char_testlist:
         assert empty_bibtexfile.num_to_char(index) == wanted_char
+    # suffixes continue with three chars and are unique
+    assert empty_bibtexfile.num_to_char(702) == 'aaa'
+    assert empty_bibtexfile.num_to_char(18277) == 'zzz'
+    suffixes = set(map(empty_bibtexfile.num_to_char, range(20000)))
+    assert len(suffixes) == 20000
         
 
 def test_strip_down_entries(empty_bibtexfile):
@@ -51,3 +56,226 @@ def test_resolve_unambigous_keys(empty_bibtexfile):
     assert empty_bibtexfile.entries[1].key == 'key_multia'
     assert empty_bibtexfile.entries[2].key == 'key_multib'
     assert empty_bibtexfile.entries[3].key == 'key_multic'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1024 * 1024])
+def test_iter_entry_strings_across_chunks(chunk_size):
+    import io
+    from zotero_bibtize.zotero_bibtize import BibTexFile, iter_entry_strings
+    contents = (
+        "% comment written before the first entry\n"
+        "@article{key1,\n  title = {{Nested} {Braces}}\n}\n\n"
+        "% comment {with {braces}} between entries}\n"
+        "@book{key2,\n  title = {Second}\n}\n"
+    )
+    wanted = [
+        "@article{key1,\n  title = {{Nested} {Braces}}\n}",
+        "@book{key2,\n  title = {Second}\n}",
+    ]
+    entries = iter_entry_strings(io.StringIO(contents), chunk_size=chunk_size)
+    assert list(entries) == wanted
+    # both scanners skip braces in comments
+    indices = BibTexFile.strip_down_entries(contents)
+    assert [contents[i:j] for (i, j) in indices] == wanted
+    # test proper error message is raised for unmatched braces
+    contents = "@entrytype{ {  }"
+    with pytest.raises(Exception) as exception:
+        list(iter_entry_strings(io.StringIO(contents), chunk_size=chunk_size))
+    assert "Unbalanced braces error" in str(exception.value)
+
+
+def test_iter_entries_matches_bibtex_file(zotero_testfile):
+    from zotero_bibtize import BibTexFile, iter_entries
+    bibtex_file = BibTexFile(str(zotero_testfile))
+    entries = iter_entries(str(zotero_testfile), chunk_size=16)
+    assert list(map(str, entries)) == list(map(str, bibtex_file.entries))
+
+
+def test_parallel_parsing_matches_serial(tempfolder, zotero_testfile):
+    from zotero_bibtize import BibTexFile
+    from zotero_bibtize.zotero_bibtize import (iter_entry_strings,
+                                               parse_entries_parallel)
+    # create a file with colliding keys
+    contents = open(str(zotero_testfile), 'r').read()
+    bibtex_file = tempfolder / 'entries.bib'
+    bibtex_file.write_text("\n".join(10 * [contents]))
+    key_format = "[author:capitalize][year]"
+    serial = BibTexFile(str(bibtex_file), key_format=key_format)
+    parallel = BibTexFile(str(bibtex_file), key_format=key_format, workers=2)
+    assert len(parallel.entries) == 10
+    assert list(map(str, parallel.entries)) == list(map(str, serial.entries))
+    assert parallel.entries[-1].key == 'Chen2014j'
+    # check the order is kept if entries are split into multiple batches
+    entries = parse_entries_parallel(iter_entry_strings(str(bibtex_file)),
+                                     workers=2, batch_size=3)
+    assert [e.fields for e in entries] == [e.fields for e in serial.entries]
+
+
+def test_worker_keeps_key_format(zotero_testfile):
+    from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+    from zotero_bibtize.zotero_bibtize import (_init_worker,
+                                               _parse_entry_batch,
+                                               iter_entry_strings)
+    entries = list(iter_entry_strings(str(zotero_testfile)))
+    key_format = CompiledKeyFormat("[author:capitalize][year]")
+    _init_worker(key_format, None, False, None)
+    # fragments cached for the first batch are reused by later batches
+    for _ in range(3):
+        assert [e.key for e in _parse_entry_batch(entries)] == ['Chen2014']
+    assert (key_format.fragment_cache.misses,
+            key_format.fragment_cache.hits) == (1, 2)
+
+
+def test_strip_down_entries_on_bytes(empty_bibtexfile):
+    test_entry = "@a{ {é} }, @b{ } }"
+    wanted_entries = ["@a{ {é} }", "@b{ }"]
+    indices = empty_bibtexfile.strip_down_entries(test_entry)
+    assert [test_entry[i:j] for (i, j) in indices] == wanted_entries
+    encoded = test_entry.encode('utf-8')
+    indices = empty_bibtexfile.strip_down_entries(encoded)
+    assert [encoded[i:j].decode('utf-8') for (i, j) in indices] == \
+        wanted_entries
+
+
+def test_iter_mapped_entry_strings(tempfolder, zotero_testfile):
+    from zotero_bibtize.zotero_bibtize import (iter_entry_strings,
+                                               iter_mapped_entry_strings)
+    mapped = iter_mapped_entry_strings(str(zotero_testfile), encoding='utf-8')
+    assert list(mapped) == list(iter_entry_strings(str(zotero_testfile)))
+    # empty files cannot be mapped but should not raise
+    empty_file = tempfolder / 'empty.bib'
+    empty_file.write_text("")
+    assert list(iter_mapped_entry_strings(str(empty_file))) == []
+
+
+def write_colliding_library(path, dois):
+    """Write entries with identical generated keys but different DOIs."""
+    entry = ("@article{{key{0},\n  author = {{Chen, M.}},\n"
+             "  year = {{2014}},\n  doi = {{{0}}}\n}}\n\n")
+    path.write_text("".join(entry.format(doi) for doi in dois))
+
+
+def test_content_disambiguation_is_order_independent(tempfolder):
+    from zotero_bibtize import BibTexFile
+    library = tempfolder / 'library.bib'
+    keys = []
+    for dois in [['1', '2', '3'], ['3', '1', '2']]:
+        write_colliding_library(library, dois)
+        bibliography = BibTexFile(str(library), key_format="[author][year]",
+                                  disambiguation='content')
+        keys.append({e.fields['doi']: e.key for e in bibliography.entries})
+    assert keys[0] == keys[1]
+    assert sorted(keys[0].values()) == ['Chen2014a', 'Chen2014b', 
+                                        'Chen2014c']
+    with pytest.raises(Exception):
+        BibTexFile(str(library), disambiguation='unknown')
+
+
+def test_registered_keys_are_stable(tempfolder):
+    from zotero_bibtize import BibTexFile
+    from zotero_bibtize.registry import KeyRegistry
+    library = tempfolder / 'library.bib'
+    registry_file = str(tempfolder / 'library.keys')
+
+    def process(dois):
+        write_colliding_library(library, dois)
+        registry = KeyRegistry(registry_file)
+        bibliography = BibTexFile(str(library), key_format="[author][year]",
+                                  key_registry=registry)
+        registry.save()
+        return {e.fields['doi']: e.key for e in bibliography.entries}
+
+    # a unique key is not changed once a colliding entry is added
+    assert process(['2']) == {'2': 'Chen2014'}
+    assert process(['1', '2']) == {'1': 'Chen2014a', '2': 'Chen2014'}
+    assert process(['0', '1', '2', '3']) == {
+        '0': 'Chen2014b', '1': 'Chen2014a', '2': 'Chen2014', '3': 'Chen2014c'}
+    # suffixes of removed entries are not reassigned
+    assert process(['0', '2', '4']) == {
+        '0': 'Chen2014b', '2': 'Chen2014', '4': 'Chen2014d'}
+
+
+def test_registered_keys_of_duplicates(tempfolder):
+    from zotero_bibtize import BibTexFile
+    from zotero_bibtize.registry import KeyRegistry
+    library = tempfolder / 'library.bib'
+    registry_file = str(tempfolder / 'library.keys')
+    # two entries sharing the same DOI (e.g. duplicates in group libraries)
+    write_colliding_library(library, ['1', '1'])
+    keys = []
+    for _ in range(3):
+        registry = KeyRegistry(registry_file)
+        bibliography = BibTexFile(str(library), key_format="[author][year]",
+                                  key_registry=registry)
+        registry.save()
+        keys.append([e.key for e in bibliography.entries])
+    assert keys[0] == ['Chen2014a', 'Chen2014b']
+    assert keys[1] == keys[0] and keys[2] == keys[0]
+    assert sorted(KeyRegistry(registry_file).registered_keys) == [
+        'Chen2014a', 'Chen2014b']
+
+
+def test_query_entries(tempfolder):
+    from zotero_bibtize import BibTexFile
+    from zotero_bibtize.zotero_bibtize import BibEntry
+    library = tempfolder / 'library.bib'
+    library.write_text(
+        "@article{a,\n  author = {van Hove, L.},\n  year = {2014},\n"
+        "  doi = {10.1000/ABC}\n}\n\n"
+        "@book{b,\n  author = {Hove, M. and Chen, M.},\n  year = {2014}\n}\n\n"
+        "@article{c,\n  author = {Hove, M.},\n  year = {2014}\n}\n\n"
+        "@article{d,\n  author = {Chen, M.},\n  year = {2015}\n}\n")
+    bibliography = BibTexFile(str(library), key_format="[author][year]")
+    # colliding keys are queried by their final keys
+    assert bibliography.get('Hove2014') is None
+    assert bibliography.get('Hove2014a').type == 'book'
+    assert bibliography.get('Hove2014b').type == 'article'
+    assert bibliography.by_doi(' 10.1000/abc').key == 'vanHove2014'
+    assert bibliography.by_doi('10.1000/missing') is None
+    assert [e.key for e in bibliography.filter(year=2014)] == [
+        'vanHove2014', 'Hove2014a', 'Hove2014b']
+    assert [e.key for e in bibliography.filter(type='Article', year='2014')] \
+        == ['vanHove2014', 'Hove2014b']
+    # the von part is not part of the last name
+    assert len(bibliography.filter(author='hove')) == 3
+    assert bibliography.filter(author='Chen', type='book') == []
+    assert len(bibliography.filter()) == 4
+    with pytest.raises(Exception) as exception:
+        bibliography.filter(journal='Nature')
+    assert "unknown index 'journal'" in str(exception.value)
+    # indexes are updated when entries are added or removed
+    added = BibEntry("@misc{new,\n  year = {2014}\n}")
+    bibliography.add_entry(added)
+    assert bibliography.get('new') is added
+    assert len(bibliography.filter(year=2014)) == 4
+    bibliography.remove_entry(bibliography.get('vanHove2014'))
+    assert bibliography.by_doi('10.1000/abc') is None
+    assert [e.key for e in bibliography.filter(year=2014)] == [
+        'Hove2014a', 'Hove2014b', 'new']
+    assert bibliography.key_map['Hove2014'] == [0, 1]
+
+
+def test_citation_filter(tempfolder):
+    from zotero_bibtize import BibTexFile
+    library = tempfolder / 'library.bib'
+    write_colliding_library(library, ['1', '2', '3'])
+    with open(str(library), 'a') as bibfile:
+        bibfile.write("@article{other,\n  author = {Rao, A.},\n"
+                      "  year = {2019}\n}\n")
+    bibliography = BibTexFile(str(library), key_format="[author][year]",
+                              citations={'Chen2014b', 'Rao2019', 'Li2020'})
+    # keys are disambiguated as if all entries were processed
+    assert [(e.key, e.fields.get('doi')) for e in bibliography.entries] == [
+        ('Chen2014b', '2'), ('Rao2019', None)]
+    assert dict(bibliography.key_map) == {'Chen2014': [0], 'Rao2019': [1]}
+    bibliography = BibTexFile(str(library), citations={'other'})
+    assert [e.key for e in bibliography.entries] == ['other']
+    # statistics report the indices of the entries in the file
+    from zotero_bibtize.cache import EntryCache
+    from zotero_bibtize.stats import Stats
+    for cache in (None, EntryCache()):
+        stats = Stats()
+        BibTexFile(str(library), key_format="[author][year]", stats=stats,
+                   cache=cache, citations={'Rao2019'})
+        assert [(index, key) for (_, index, key)
+                in stats.slowest_entries()] == [(3, 'Rao2019')]
@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
 
-from zotero_bibtize.zotero_bibtize import BibTexFile
+__all__ = ['BibTexFile', 'iter_entries']
 
-__all__ = ['BibTexFile']
+
+def __getattr__(name):
+    # the parser is only imported when it is used, keeping the startup of the
+    # command line interface (and of the other submodules) fast
+    if name in __all__:
+        from zotero_bibtize import zotero_bibtize
+        return getattr(zotero_bibtize, name)
+    raise AttributeError("module {!r} has no attribute {!r}"
+                         .format(__name__, name))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import re
+
+
+# citations written by LaTeX (\cite, \nocite, natbib) and biblatex
+_CITATION_REGEX = re.compile(
+    r"\\(?:citation|abx@aux@cite(?:\{[^{}]*\})?)\{([^{}]*)\}")
+# auxiliary files of included files (\include)
+_INPUT_REGEX = re.compile(r"\\@input\{([^{}]*)\}")
+
+
+def read_citations(aux_file):
+    """
+    Collect the keys of all entries cited in a LaTeX auxiliary file.
+
+    Auxiliary files of included files (i.e. `\\@input{chapter.aux}`) are
+    read as well, missing included files are skipped.
+
+    :param str aux_file: path to the .aux file
+    :returns: set of the cited keys or None if all entries are cited (i.e.
+        `\\nocite{*}`)
+    """
+    aux_file = os.path.abspath(aux_file)
+    # included files are given relative to the directory of the main file
+    root = os.path.dirname(aux_file)
+    citations = set()
+    pending = [aux_file]
+    visited = set()
+    while pending:
+        path = pending.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+        try:
+            with open(path, 'r', errors='replace') as auxfile:
+                contents = auxfile.read()
+        except OSError:
+            if path == aux_file:
+                raise
+            continue
+        for match in _CITATION_REGEX.finditer(contents):
+            citations.update(key.strip() for key in match.group(1).split(','))
+        for match in _INPUT_REGEX.finditer(contents):
+            pending.append(os.path.join(root, match.group(1)))
+    citations.discard('')
+    if '*' in citations:
+        return None
+    return citations
+
+
+def key_candidates(citations):
+    """
+    Generated keys of entries possibly cited with the given keys.
+
+    Disambiguated keys are the generated keys with a suffix a-z, aa-zz, ...
+    appended, i.e. an entry may be cited if its generated key equals a
+    cited key after removing any number of trailing lowercase letters.
+
+    :param citations: the cited keys
+    :returns: a frozenset of the candidate keys
+    """
+    candidates = set()
+    for key in citations:
+        candidates.add(key)
+        stop = len(key)
+        while stop > 0 and 'a' <= key[stop - 1] <= 'z':
+            stop -= 1
+            candidates.add(key[:stop])
+    return frozenset(candidates)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import glob
+import time
+
+from zotero_bibtize.registry import KeyRegistry, default_registry_file
+from zotero_bibtize.writer import write_entries
+from zotero_bibtize.zotero_bibtize import BibTexFile, compile_key_format
+
+
+class BatchResult(object):
+    """
+    Outcome of processing a single file of a batch.
+
+    :param str input_file: path to the processed bibtex file
+    :param str output_file: path to the written output file
+    :param int num_entries: number of processed entries
+    :param float elapsed: processing time (in s)
+    :param str error: error message if processing failed (None otherwise)
+    :param bool unchanged: whether the output file was left unchanged
+    """
+    def __init__(self, input_file, output_file, num_entries=0, elapsed=0.0,
+                 error=None, unchanged=False):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.num_entries = num_entries
+        self.elapsed = elapsed
+        self.error = error
+        self.unchanged = unchanged
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def __str__(self):
+        if self.failed:
+            return "FAILED {} ({:.2f}s): {}".format(self.input_file,
+                                                   self.elapsed, self.error)
+        return "OK     {} ({} entries, {}{:.2f}s)".format(
+            self.input_file, self.num_entries,
+            "unchanged, " if self.unchanged else "", self.elapsed)
+
+
+def find_bibtex_files(pattern):
+    """
+    Find all bibtex files matching the given pattern.
+
+    :param str pattern: a directory (searched recursively) or a glob pattern
+        (`**` matches any number of subdirectories)
+    :returns: the sorted list of bibtex files (hidden files, like backups
+        or caches, are skipped)
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '**', '*.bib')
+    bib_files = []
+    for path in glob.glob(pattern, recursive=True):
+        if not path.endswith('.bib') or not os.path.isfile(path):
+            continue
+        if os.path.basename(path).startswith('.'):
+            continue
+        bib_files.append(os.path.abspath(path))
+    return sorted(bib_files)
+
+
+def output_files(input_files, output_dir=None):
+    """
+    Map input files to their output files.
+
+    :param list input_files: list of absolute paths to the input files
+    :param str output_dir: directory mirroring the tree of the input files
+        (if None the input files will be overwritten)
+    """
+    if output_dir is None:
+        return list(input_files)
+    if not input_files:
+        return []
+    root = os.path.commonpath([os.path.dirname(f) for f in input_files])
+    return [os.path.join(output_dir, os.path.relpath(f, root))
+            for f in input_files]
+
+
+def process_file(input_file, output_file, key_format=None, omit_fields=None,
+                 disambiguation='position', stable_keys=False,
+                 keep_fields=None):
+    """
+    Process a single file and report the result instead of raising.
+
+    If the input file is overwritten (and changed) a backup of it is stored
+    in a hidden file next to the input file. If `stable_keys` is set the
+    assigned keys are kept in a key registry next to the input file.
+
+    :returns: a :class:`BatchResult` instance
+    """
+    start = time.perf_counter()
+    try:
+        backup = None
+        if os.path.abspath(input_file) == os.path.abspath(output_file):
+            (root, name) = os.path.split(input_file)
+            backup = os.path.join(root, '.{}.orig'.format(name))
+        else:
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        key_registry = None
+        if stable_keys:
+            key_registry = KeyRegistry(default_registry_file(input_file))
+        bibliography = BibTexFile(input_file, key_format, omit_fields,
+                                  disambiguation=disambiguation,
+                                  key_registry=key_registry,
+                                  keep_fields=keep_fields)
+        written = write_entries(bibliography.entries, output_file,
+                                backup_file=backup)
+        if key_registry is not None:
+            key_registry.save()
+    except Exception as exception:
+        return BatchResult(input_file, output_file,
+                           elapsed=time.perf_counter() - start,
+                           error=str(exception) or type(exception).__name__)
+    return BatchResult(input_file, output_file,
+                       num_entries=len(bibliography.entries),
+                       elapsed=time.perf_counter() - start,
+                       unchanged=not written)
+
+
+def process_batch(input_files, output_dir=None, key_format=None,
+                  omit_fields=None, workers=1, disambiguation='position',
+                  stable_keys=False, keep_fields=None):
+    """
+    Process many bibtex files concurrently.
+
+    Files are distributed over a pool of worker processes, failures of
+    single files are reported in the results and do not stop the batch. If
+    a worker process dies all files not processed yet are retried one at a
+    time in a separate worker process, such that only the file killing the
+    worker is reported as failed.
+
+    :param list input_files: list of paths to the input files
+    :param str output_dir: directory mirroring the tree of the input files
+        (if None the input files will be overwritten)
+    :param key_format: optional format used to generate entry keys
+    :param str omit_fields: comma separated list of fields to skip
+    :param int workers: number of worker processes (None uses all available
+        processors)
+    :param str disambiguation: strategy used to disambiguate colliding keys
+    :param bool stable_keys: keep assigned keys in a registry next to every
+        input file
+    :param str keep_fields: comma separated list of the only fields to keep
+    :returns: a generator yielding :class:`BatchResult` instances in the
+        order of the input files
+    """
+    input_files = [os.path.abspath(f) for f in input_files]
+    outputs = output_files(input_files, output_dir)
+    key_format = compile_key_format(key_format)
+    if workers == 1 or len(input_files) < 2:
+        for (input_file, output_file) in zip(input_files, outputs):
+            yield process_file(input_file, output_file, key_format,
+                               omit_fields, disambiguation, stable_keys,
+                               keep_fields)
+        return
+    import concurrent.futures
+    from concurrent.futures.process import BrokenProcessPool
+    jobs = [(input_file, output_file, key_format, omit_fields, disambiguation,
+             stable_keys, keep_fields)
+            for (input_file, output_file) in zip(input_files, outputs)]
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(process_file, *job) for job in jobs]
+        for (index, future) in enumerate(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                break
+            yield result
+        else:
+            return
+    # the file killing the worker is unknown, every file which was not
+    # processed before the pool broke is therefore retried in isolation
+    for (job, future) in zip(jobs[index:], futures[index:]):
+        if future.exception() is None:
+            yield future.result()
+        else:
+            yield _process_isolated(job)
+
+
+def _process_isolated(job):
+    """Process a file of the batch in a worker process of its own."""
+    import concurrent.futures
+    from concurrent.futures.process import BrokenProcessPool
+    with concurrent.futures.ProcessPoolExecutor(1) as pool:
+        try:
+            return pool.submit(process_file, *job).result()
+        except BrokenProcessPool as exception:
+            (input_file, output_file) = job[:2]
+            return BatchResult(input_file, output_file, error=str(exception))
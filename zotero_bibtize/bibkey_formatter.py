@@ -2,12 +2,93 @@
 
 
 import re
+import collections
+
+from zotero_bibtize.defaults import DEFAULT_FRAGMENT_CACHE_SIZE
+from zotero_bibtize.names import parse_names
+
+
+# a list of function words as defined by JabRef
+# (cf. https://docs.jabref.org/setup/bibtexkeypatterns)
+FUNCTION_WORDS = frozenset([
+    "a", "an", "the", "above", "about", "across", "against", "along",
+    "among", "around", "at", "before", "behind", "below", "beneath",
+    "beside", "between", "beyond", "by", "down", "during", "except",
+    "for", "from", "in", "inside", "into", "like", "near", "of", "off",
+    "on", "onto", "since", "to", "toward", "through", "under", "until",
+    "up", "upon", "with", "within", "without", "and", "but", "for",
+    "nor", "or", "so", "yet"
+])
+
+
+def load_function_words(path):
+    """
+    Load an additional list of function words from a file.
+
+    The file is expected to contain whitespace separated words, everything
+    following a '#' on a line is treated as comment.
+
+    :param str path: path to the file containing the function words
+    :returns: a frozenset of the (casefolded) function words
+    """
+    function_words = set()
+    with open(path, 'r') as word_file:
+        for line in word_file:
+            line = line.split('#', 1)[0]
+            function_words.update(w.casefold() for w in line.split())
+    return frozenset(function_words)
+
+
+class FragmentCache(object):
+    """
+    Bounded LRU cache of formatted key fragments.
+
+    Fragments are stored by (field, raw field content, format arguments)
+    such that recurring field contents (e.g. journal names) only have to be
+    formatted once. The cached fragments depend on the function words, a
+    cache must therefore not be shared between formatters using different
+    function words.
+
+    :param int max_size: maximal number of cached fragments (0 disables the
+        cache)
+    """
+    def __init__(self, max_size=DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.fragments = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute, *args):
+        """
+        Get the fragment for the key computing it if it is not cached.
+
+        :param key: hashable key identifying the fragment
+        :param compute: callable computing the fragment from `args`
+        """
+        try:
+            fragment = self.fragments[key]
+        except KeyError:
+            self.misses += 1
+            fragment = compute(*args)
+            if self.max_size:
+                self.fragments[key] = fragment
+                if len(self.fragments) > self.max_size:
+                    self.fragments.popitem(last=False)
+            return fragment
+        self.hits += 1
+        self.fragments.move_to_end(key)
+        return fragment
 
 
 class KeyFormatter(object):
-    def __init__(self, bibtex_fields, entry_type=None):
+    def __init__(self, bibtex_fields, entry_type=None, function_words=None,
+                 fragment_cache=None):
         self.bibtex_entry_type = entry_type
         self.bibtex_fields = bibtex_fields
+        if function_words is None:
+            function_words = FUNCTION_WORDS
+        self.function_words = function_words
+        self.fragment_cache = fragment_cache
         self.field_format_map = {
             'author': self.format_author_key,
             'year': self.format_year_key,
@@ -16,16 +97,18 @@ class KeyFormatter(object):
         }
 
     def generate_key(self, key_format):
-        """Generate a bibtex key according to the defined format."""
-        format_list = self.unpack_format_entries(key_format)
-        bibkey = key_format
-        for ((field, format_actions), raw) in format_list:
-            formatted_key = self.field_format_map[field](*format_actions)
-            formatter = "[{}]".format(raw)
-            bibkey = bibkey.replace(formatter, formatted_key)
-        return bibkey
-
-    def unpack_format_entries(self, key_format):
+        """
+        Generate a bibtex key according to the defined format.
+
+        :param key_format: the key format string or a
+            :class:`CompiledKeyFormat` instance
+        """
+        if not isinstance(key_format, CompiledKeyFormat):
+            key_format = CompiledKeyFormat(key_format)
+        return key_format.format_key(self)
+
+    @staticmethod
+    def unpack_format_entries(key_format):
         """Extract the format entries from the total key_format string."""
         format_regex = r"\[(.*?)\]"
         format_entries = re.findall(format_regex, key_format)
@@ -37,7 +120,22 @@ class KeyFormatter(object):
             entry_type, *format_actions = format_entry.split(':')
             format_list.append((entry_type, format_actions))
         return zip(format_list, format_entries)
-        
+
+    def cached_fragment(self, field, content, format_args, compute):
+        """
+        Format the field content using the fragment cache (if any).
+
+        :param str field: name of the formatted field
+        :param str content: the raw field content
+        :param tuple format_args: the format arguments
+        :param compute: method computing the fragment from the content and
+            the format arguments
+        """
+        if self.fragment_cache is None:
+            return compute(content, format_args)
+        return self.fragment_cache.get((field, content, format_args),
+                                       compute, content, format_args)
+
     def apply_format_to_content(self, content, format_action):
         """ 
         Apply format actions to every word contained in content list
@@ -93,29 +191,18 @@ class KeyFormatter(object):
 
     def remove_function_words(self, content_string, is_journal=False):
         """Remove all function words from the given string."""
-        # a list of function words as defined by JabRef
-        # (cf. https://docs.jabref.org/setup/bibtexkeypatterns)=False
-        function_words_list =  [
-            "a", "an", "the", "above", "about", "across", "against", "along", 
-            "among", "around", "at", "before", "behind", "below", "beneath", 
-            "beside", "between", "beyond", "by", "down", "during", "except", 
-            "for", "from", "in", "inside", "into", "like", "near", "of", "off", 
-            "on", "onto", "since", "to", "toward", "through", "under", "until",
-            "up", "upon", "with", "within", "without", "and", "but", "for", 
-            "nor", "or", "so", "yet"
-        ]
-        # join single words with regex 'or' operator
-        function_words = "|".join(function_words_list)
-        word_regex = r"(?i)(?:^|(?<=\s))({})(?:(?=\s)|$)".format(function_words)
-        # for journals do not match at the end of the string which would remove
+        words = content_string.split()
+        # for journals do not remove the last word which would remove
         # 'A' from journal names like Journal of Materials Chemistry A or
         # Physical Review A
-        if is_journal:
-            word_regex = r"(?i)(?:^|(?<=\s))({})(?:(?=\s))".format(function_words)
-        content_string = re.sub(word_regex, '', content_string).strip()
-        # remove consecutive whitespaces
-        content_string = re.sub(r"\s+", " ", content_string)
-        return content_string
+        keep_last = is_journal and words and not content_string[-1].isspace()
+        if keep_last:
+            last_word = words.pop()
+        function_words = self.function_words
+        words = [w for w in words if w.casefold() not in function_words]
+        if keep_last:
+            words.append(last_word)
+        return " ".join(words)
 
     def format_author_key(self, *format_args):
         """Generate formatted author key entry."""
@@ -123,23 +210,28 @@ class KeyFormatter(object):
         if not authors:  # use editors if no authors present
             authors = self.bibtex_fields.get('editor', '')
         if not authors:  # fallback to no name if nothing given
-            authors = 'No Name'
-        authors = self.remove_latex_content(authors)
+            authors = '{No Name}'
+        return self.cached_fragment('author', authors, format_args,
+                                    self.author_fragment)
+
+    def author_fragment(self, authors, format_args):
+        """Format the author key entry from the given authors."""
         N_entry = 1  # default number of authors to use for the entry
         if len(format_args) != 0:
             if re.match(r"\d+", format_args[0]):
                 N_entry = int(format_args[0])
                 format_args = format_args[1:]
-        author_list = [lastname.strip() for author in re.split(r'\b(?:and)\b', authors) 
-                                        for lastname in author.split(',')[:1]] 
-        # do not use more than N_entry author names for the entry
-        author_list = author_list[:N_entry]
+        # do not use more than N_entry author names for the entry (a
+        # trailing 'and others' does not name an author)
+        names = [name for name in parse_names(authors, max_names=N_entry)
+                 if name.surname != 'others']
         # before applying the format split author names at empty spaces such
         # that a prefixed name (for instance 'Van Hove') is treated properly
-        author_list = [entry for author in author_list 
-                             for entry in author.split(" ")]
+        author_list = [entry for name in names
+                             for entry in self.remove_latex_content(
+                                 name.surname).split(" ") if entry]
         for format_arg in format_args:
-            author_list = self.apply_format_to_content(author_list, format_arg)    
+            author_list = self.apply_format_to_content(author_list, format_arg)
         
         return "".join(author_list)
 
@@ -168,6 +260,11 @@ class KeyFormatter(object):
         if self.bibtex_entry_type in no_journal:
             return ''
         journal = self.bibtex_fields.get('journal', 'No Journal')
+        return self.cached_fragment('journal', journal, format_args,
+                                    self.journal_fragment)
+
+    def journal_fragment(self, journal, format_args):
+        """Format the journal key entry from the given journal name."""
         if len(format_args) != 0:
             if re.match(r"\d+", format_args[0]):
                 raise Exception("cannot define the number of words to use for "
@@ -184,6 +281,11 @@ class KeyFormatter(object):
     def format_title_key(self, *format_args):
         """Generate formatted title key entry."""
         title = self.bibtex_fields.get('title', 'No Title')
+        return self.cached_fragment('title', title, format_args,
+                                    self.title_fragment)
+
+    def title_fragment(self, title, format_args):
+        """Format the title key entry from the given title."""
         title = self.remove_latex_content(title)
         N_entry = 3  # default number of words to use for the entry
         if len(format_args) != 0:
@@ -195,5 +297,99 @@ class KeyFormatter(object):
         # do not use more than N_entry title words for the entry
         title_list = title.split(' ')[:N_entry]
         for format_arg in format_args:
-            title_list = self.apply_format_to_content(title_list, format_arg)    
+            title_list = self.apply_format_to_content(title_list, format_arg)
         return "".join(title_list)
+
+
+class CompiledKeyFormat(object):
+    """
+    Key format parsed and validated once to be reused for many entries.
+
+    The key format is split into literal parts and field formatters such that
+    generating the key of an entry only requires calling the formatters.
+    Invalid fields or format actions raise immediately on construction.
+
+    :param str key_format: the key format, e.g. `[author][year]`
+    :param frozenset function_words: function words removed from titles
+        and journal names (defaults to :data:`FUNCTION_WORDS`)
+    :param int cache_size: maximal number of formatted author, journal and
+        title fragments cached for reuse (0 disables the cache)
+    """
+    field_formatters = {
+        'author': KeyFormatter.format_author_key,
+        'year': KeyFormatter.format_year_key,
+        'journal': KeyFormatter.format_journal_key,
+        'title': KeyFormatter.format_title_key,
+    }
+    format_actions = ['upper', 'lower', 'capitalize', 'abbreviate', 'abbr']
+
+    def __init__(self, key_format, function_words=None,
+                 cache_size=DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.key_format = key_format
+        self.function_words = function_words
+        self.fragment_cache = FragmentCache(cache_size)
+        # validate the format (also raises if no format entries are found)
+        for ((field, format_args), raw) in \
+                KeyFormatter.unpack_format_entries(key_format):
+            self.validate_format_args(field, format_args)
+        # the split contains literal parts at even and field formats at odd
+        # positions
+        self.plan = []
+        for (index, part) in enumerate(re.split(r"\[(.*?)\]", key_format)):
+            if index % 2 == 0:
+                if part:
+                    self.plan.append(part)
+            else:
+                field, *format_args = part.split(':')
+                self.plan.append((self.field_formatters[field],
+                                  tuple(format_args)))
+
+    def __reduce__(self):
+        # recompile when unpickled (i.e. when sent to worker processes)
+        return (CompiledKeyFormat, (self.key_format, self.function_words,
+                                    self.fragment_cache.max_size))
+
+    def validate_format_args(self, field, format_args):
+        """Check the field and its format arguments are valid."""
+        if field not in self.field_formatters:
+            raise Exception("unknown field '{}' in key format '{}' (allowed "
+                            "fields are {})".format(
+                                field, self.key_format,
+                                ", ".join(sorted(self.field_formatters))))
+        if field == 'year':
+            # additional format commands are silently ignored
+            if format_args and format_args[0] not in ["long", "short"]:
+                raise Exception("unknown format argument {} for year "
+                                "(allowed arguments are 'short' or 'long')"
+                                .format(format_args[0]))
+            return
+        if format_args and re.match(r"\d+", format_args[0]):
+            if field == 'journal':
+                raise Exception("cannot define the number of words to use "
+                                "for the journal key format")
+            if not format_args[0].isdigit():
+                raise Exception("invalid number of words '{}' for {}"
+                                .format(format_args[0], field))
+            format_args = format_args[1:]
+        for format_action in format_args:
+            if format_action not in self.format_actions:
+                raise Exception("Unknown format action: {}"
+                                .format(format_action))
+
+    def generate_key(self, bibtex_fields, entry_type=None):
+        """Generate the key for an entry with the given fields and type."""
+        key_formatter = KeyFormatter(bibtex_fields, entry_type=entry_type,
+                                     function_words=self.function_words,
+                                     fragment_cache=self.fragment_cache)
+        return self.format_key(key_formatter)
+
+    def format_key(self, key_formatter):
+        """Generate the key using the given :class:`KeyFormatter`."""
+        bibkey = []
+        for part in self.plan:
+            if isinstance(part, str):
+                bibkey.append(part)
+            else:
+                formatter, format_args = part
+                bibkey.append(formatter(key_formatter, *format_args))
+        return "".join(bibkey)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+
+import collections
+import hashlib
+import json
+
+from zotero_bibtize.defaults import DEFAULT_MAX_ENTRIES
+from zotero_bibtize.writer import write_entries
+
+
+class EntryCache(object):
+    """
+    Cache of parsed bibtex entries.
+
+    Parsed entries (i.e. type, generated key and fields) are stored by the
+    hash of the raw entry string combined with the settings used to parse
+    it, such that unchanged entries do not have to be parsed again when the
+    same file is processed repeatedly.
+
+    :param str cache_file: path of the file the cache is stored to (if not
+        given the cache is only kept in memory)
+    :param int max_entries: maximal number of entries kept in the cache
+    """
+    version = 1
+
+    def __init__(self, cache_file=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.entries = {}
+        # entries looked up or added since the last pruning
+        self.used = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_file is not None:
+            self.entries = self.load_cache_file(cache_file)
+
+    def load_cache_file(self, cache_file):
+        """Load cached entries (invalid or outdated files are ignored)."""
+        try:
+            with open(cache_file, 'r') as cache:
+                contents = json.load(cache)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(contents, dict):
+            return {}
+        if contents.get('version') != self.version:
+            return {}
+        return contents.get('entries', {})
+
+    @staticmethod
+    def entry_hash(raw_entry_string, settings=''):
+        """Hash identifying the raw entry parsed with the given settings."""
+        content = '{}\0{}'.format(settings, raw_entry_string)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def get(self, entry_hash):
+        """
+        Get the cached (type, key, fields) record for the given hash.
+
+        :returns: the cached record or None if the entry is not cached
+        """
+        record = self.entries.get(entry_hash)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[entry_hash] = record
+        return record
+
+    def put(self, entry_hash, entry_type, entry_key, entry_fields):
+        """Store the parsed entry for the given hash."""
+        record = [entry_type, entry_key, list(entry_fields.items())]
+        self.entries[entry_hash] = record
+        self.used[entry_hash] = record
+
+    def prune(self):
+        """
+        Evict all entries not used since the last pruning.
+
+        If more than `max_entries` entries were used only the most recently
+        used ones are kept.
+        """
+        used = list(self.used.items())
+        if self.max_entries is not None:
+            used = used[max(0, len(used) - self.max_entries):]
+        self.entries = dict(used)
+        self.used = collections.OrderedDict()
+
+    def save(self):
+        """Prune the cache and write it to the cache file."""
+        self.prune()
+        if self.cache_file is None:
+            return
+        contents = {'version': self.version, 'entries': self.entries}
+        write_entries([json.dumps(contents)], self.cache_file)
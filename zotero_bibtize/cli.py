@@ -2,10 +2,10 @@
 
 
 import click
-import pathlib
-import shutil
 
-from zotero_bibtize import BibTexFile
+from zotero_bibtize.defaults import (DEFAULT_FRAGMENT_CACHE_SIZE,
+                                     DEFAULT_MAX_ENTRIES,
+                                     DISAMBIGUATION_STRATEGIES, OUTPUT_FORMATS)
 
 
 @click.command()
@@ -20,8 +20,85 @@ from zotero_bibtize import BibTexFile
               help=("Define a list of BibTex fields as comma separated list, "
                     "i.e. field1,field2,field3,..., that will not be written "
                     "to the output file"))
+@click.option('--keep-fields', required=False, default=None,
+              help=("Define a list of BibTex fields as comma separated list, "
+                    "i.e. field1,field2,field3,..., that will be the only "
+                    "fields written to the output file"))
+@click.option('--function-words', required=False, multiple=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help=("File containing additional function words (separated "
+                    "by whitespace) that will be removed from titles and "
+                    "journal names when generating custom keys. May be "
+                    "given multiple times"))
+@click.option('--key-cache-size', required=False,
+              default=DEFAULT_FRAGMENT_CACHE_SIZE, type=click.IntRange(0),
+              show_default=True,
+              help=("Maximal number of formatted author, journal and title "
+                    "key parts cached for reuse (0 disables the cache)"))
+@click.option('--jobs', '-j', required=False, default=1, type=click.IntRange(0),
+              help=("Number of worker processes used to parse the entries "
+                    "(0 uses all available processors)"))
+@click.option('--cache', is_flag=True, default=False,
+              help=("Cache parsed entries in a file next to the input file "
+                    "such that only new or modified entries are parsed on "
+                    "subsequent runs"))
+@click.option('--cache-size', required=False, default=DEFAULT_MAX_ENTRIES,
+              type=click.IntRange(1), show_default=True,
+              help="Maximal number of entries kept in the cache")
+@click.option('--watch', is_flag=True, default=False,
+              help=("Keep running and reprocess the input file whenever it "
+                    "is modified (requires an output file different from "
+                    "the input file)"))
+@click.option('--poll-interval', required=False, default=1.0,
+              type=click.FloatRange(0), show_default=True,
+              help="Time between two checks of the input file in watch mode")
+@click.option('--debounce', required=False, default=0.5,
+              type=click.FloatRange(0), show_default=True,
+              help=("Time the input file has to remain unchanged before it "
+                    "is processed in watch mode"))
+@click.option('--batch', required=False, default=None, metavar='PATH_OR_GLOB',
+              help=("Process all bibtex files found in the given directory "
+                    "tree or matching the given glob pattern (input and "
+                    "output file arguments are ignored)"))
+@click.option('--output-dir', required=False, default=None,
+              type=click.Path(file_okay=False),
+              help=("Directory the processed files are written to in batch "
+                    "mode, mirroring the tree of the input files (if "
+                    "undefined the input files will be overwritten)"))
+@click.option('--stats', is_flag=True, default=False,
+              help=("Print the time spent in the individual processing "
+                    "phases, entry counts and the slowest entries"))
+@click.option('--slowest', required=False, default=10,
+              type=click.IntRange(0), show_default=True,
+              help="Number of slowest entries reported by --stats")
+@click.option('--profile', required=False, default=None,
+              type=click.Path(dir_okay=False),
+              help=("Profile the processing and dump the cProfile "
+                    "statistics to the given file"))
+@click.option('--disambiguation', required=False, default='position',
+              type=click.Choice(DISAMBIGUATION_STRATEGIES), show_default=True,
+              help=("Order in which suffixes are appended to colliding keys, "
+                    "either by the position of the entries in the file or "
+                    "by their contents (i.e. DOI or title)"))
+@click.option('--stable-keys', is_flag=True, default=False,
+              help=("Keep the keys assigned to entries in a file next to "
+                    "the input file such that keys of existing entries do "
+                    "not change when colliding entries are added"))
+@click.option('--format', 'output_format', required=False, default='bibtex',
+              type=click.Choice(OUTPUT_FORMATS), show_default=True,
+              help=("Format of the output file, i.e. BibTeX, JSON Lines "
+                    "(one record of entry type, key and fields per line) or "
+                    "CSL-JSON (requires an output file)"))
+@click.option('--aux', required=False, default=None,
+              type=click.Path(exists=True, dir_okay=False),
+              help=("LaTeX .aux file of a document, only the entries cited "
+                    "in the document will be written to the output file"))
             
-def zotero_bibtize(input_file, output_file, key_format, omit_fields):
+def zotero_bibtize(input_file, output_file, key_format, omit_fields,
+                   function_words, key_cache_size, jobs, cache, cache_size,
+                   watch, poll_interval, debounce, batch, output_dir, stats,
+                   slowest, profile, disambiguation, stable_keys, keep_fields,
+                   output_format, aux):
     """
     Transform Zotero BibTex files to LaTeX friendly representation.
 
@@ -30,6 +107,48 @@ def zotero_bibtize(input_file, output_file, key_format, omit_fields):
     contents. Processed contents are then written back to the `output_file`
     (if undefined the input file will be overwritten!)
     """
+    # modules are imported where they are used such that printing the usage
+    # does not load the parser and a plain run only loads what it needs
+    import pathlib
+
+    # add user defined function words to the default ones
+    if key_format is not None:
+        from zotero_bibtize.bibkey_formatter import (CompiledKeyFormat,
+                                                     FUNCTION_WORDS,
+                                                     load_function_words)
+        words = None
+        if function_words:
+            words = FUNCTION_WORDS.union(*map(load_function_words,
+                                              function_words))
+        key_format = CompiledKeyFormat(key_format, function_words=words,
+                                       cache_size=key_cache_size)
+    if batch is not None:
+        unsupported = [('--aux', aux is not None),
+                       ('--format', output_format != 'bibtex'),
+                       ('--cache', cache), ('--watch', watch),
+                       ('--stats', stats), ('--profile', profile is not None)]
+        for (option, used) in unsupported:
+            if used:
+                raise click.UsageError("The {} option can not be used in "
+                                       "batch mode.".format(option))
+        from zotero_bibtize.batch import find_bibtex_files, process_batch
+        bib_files = find_bibtex_files(batch)
+        if len(bib_files) == 0:
+            raise Exception("No bibtex files found matching '{}'."
+                            .format(batch))
+        failed = 0
+        for result in process_batch(bib_files, output_dir, key_format,
+                                    omit_fields, workers=jobs or None,
+                                    disambiguation=disambiguation,
+                                    stable_keys=stable_keys,
+                                    keep_fields=keep_fields):
+            failed += result.failed
+            click.echo(str(result))
+        click.echo("Processed {} files ({} failed)"
+                   .format(len(bib_files), failed))
+        if failed:
+            raise click.exceptions.Exit(1)
+        return
     # check input path
     input_path = pathlib.Path(input_file).absolute()
     if input_path.is_dir():
@@ -46,16 +165,96 @@ def zotero_bibtize(input_file, output_file, key_format, omit_fields):
         bib_in = input_path
     # check output path
     output_path = pathlib.Path(output_file).absolute()
+    if watch and (stats or profile is not None):
+        raise click.UsageError("The --stats and --profile options can not be "
+                               "used in watch mode.")
+    if watch and (output_path.is_dir() or output_path == bib_in):
+        raise Exception("Watch mode requires an output file different from "
+                        "the input file.")
+    # the input file is backed up if it is overwritten (and changed)
     bib_backup = bib_in.with_name('.' + bib_in.name).with_suffix('.bib.orig')
     if output_path.is_dir():
-        shutil.copyfile(str(bib_in), str(bib_backup))
         bib_out = bib_in
     else:  # output_path.is_file()
-        # check if the same file is specified and backup if yes
-        if output_path == input_path:
-            shutil.copyfile(str(bib_in), str(bib_backup))
         bib_out = output_path
+    if bib_out != bib_in:
+        bib_backup = None
+    elif output_format != 'bibtex':
+        raise Exception("Writing the {} format requires an output file "
+                        "different from the input file.".format(output_format))
+    entry_cache = None
+    if cache:
+        from zotero_bibtize.cache import EntryCache
+        cache_file = bib_in.with_name('.{}.cache'.format(bib_in.name))
+        entry_cache = EntryCache(str(cache_file), max_entries=cache_size)
+    key_registry = None
+    if stable_keys:
+        from zotero_bibtize.registry import KeyRegistry, default_registry_file
+        key_registry = KeyRegistry(default_registry_file(str(bib_in)))
+    if watch:
+        from zotero_bibtize.watch import BibTexWatcher
+        watcher = BibTexWatcher(str(bib_in), str(bib_out), key_format,
+                                omit_fields, workers=jobs or None,
+                                interval=poll_interval, debounce=debounce,
+                                cache=entry_cache,
+                                disambiguation=disambiguation,
+                                key_registry=key_registry,
+                                keep_fields=keep_fields, aux_file=aux,
+                                output_format=output_format)
+        click.echo("Watching {} for changes (press Ctrl+C to stop)"
+                   .format(bib_in))
+        watcher.run(callback=lambda bibliography: click.echo(
+            "Processed {} entries{}".format(
+                len(bibliography.entries),
+                "" if watcher.written else " (output unchanged)")),
+            error_callback=lambda error: click.echo(
+                "Failed to process {}: {}".format(bib_in, error), err=True))
+        return
+    from zotero_bibtize import BibTexFile
+    from zotero_bibtize.stats import NULL_STATS
+    from zotero_bibtize.writer import write_entries
+    citations = None
+    if aux is not None:
+        from zotero_bibtize.auxfile import read_citations
+        citations = read_citations(aux)
+    run_stats = NULL_STATS
+    if stats:
+        from zotero_bibtize.stats import Stats
+        run_stats = Stats(num_slowest=slowest)
+    profiler = None
+    if profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
     # read in and write processed contents back
-    bibliography = BibTexFile(str(bib_in), key_format, omit_fields)
-    with open(str(bib_out), 'w') as bib_out_file:
-        bib_out_file.write(''.join(map(str, bibliography.entries)))
+    bibliography = BibTexFile(str(bib_in), key_format, omit_fields,
+                              workers=jobs or None, cache=entry_cache,
+                              stats=run_stats, disambiguation=disambiguation,
+                              key_registry=key_registry,
+                              keep_fields=keep_fields, citations=citations)
+    with run_stats.phase('write'):
+        if output_format == 'bibtex':
+            serialized = (str(bibentry) for bibentry in bibliography.entries)
+        else:
+            from zotero_bibtize.formats import serialize_entries
+            serialized = serialize_entries(bibliography.entries,
+                                           output_format)
+        written = write_entries(
+            serialized, str(bib_out),
+            backup_file=str(bib_backup) if bib_backup else None)
+    if not written:
+        click.echo("Output file {} unchanged".format(bib_out))
+    if citations is not None:
+        missing = citations.difference(e.key for e in bibliography.entries)
+        if missing:
+            click.echo("Cited entries not found: {}".format(
+                ", ".join(sorted(missing))), err=True)
+    if entry_cache is not None:
+        entry_cache.save()
+    if key_registry is not None:
+        key_registry.save()
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile)
+    if run_stats.enabled:
+        click.echo(run_stats.report())
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+
+# default settings used to define the command line options, kept free of any
+# imports such that the options are available without loading the parser
+
+
+# default maximal number of key fragments cached per key format
+DEFAULT_FRAGMENT_CACHE_SIZE = 4096
+
+# default maximal number of entries kept in the entry cache
+DEFAULT_MAX_ENTRIES = 100000
+
+# orders in which suffixes are assigned to entries with colliding keys
+DISAMBIGUATION_STRATEGIES = ('position', 'content')
+
+# formats processed bibliographies can be written in
+OUTPUT_FORMATS = ('bibtex', 'jsonl', 'csl-json')
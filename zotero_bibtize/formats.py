@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+
+import json
+import re
+
+from zotero_bibtize.defaults import OUTPUT_FORMATS
+from zotero_bibtize.names import parse_names
+from zotero_bibtize.zotero_bibtize import BibEntry
+
+# bibtex entry types and the corresponding CSL item types
+CSL_TYPES = {
+    'article': 'article-journal',
+    'book': 'book',
+    'booklet': 'pamphlet',
+    'inbook': 'chapter',
+    'incollection': 'chapter',
+    'inproceedings': 'paper-conference',
+    'conference': 'paper-conference',
+    'manual': 'report',
+    'mastersthesis': 'thesis',
+    'phdthesis': 'thesis',
+    'techreport': 'report',
+    'unpublished': 'manuscript',
+    'online': 'webpage',
+}
+
+# bibtex fields copied to CSL variables as they are
+CSL_VARIABLES = {
+    'title': 'title',
+    'journal': 'container-title',
+    'booktitle': 'container-title',
+    'shorttitle': 'title-short',
+    'volume': 'volume',
+    'number': 'issue',
+    'edition': 'edition',
+    'publisher': 'publisher',
+    'address': 'publisher-place',
+    'school': 'publisher',
+    'institution': 'publisher',
+    'doi': 'DOI',
+    'url': 'URL',
+    'isbn': 'ISBN',
+    'issn': 'ISSN',
+    'abstract': 'abstract',
+    'language': 'language',
+    'note': 'note',
+}
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep',
+          'oct', 'nov', 'dec']
+
+
+def serialize_entries(entries, output_format='bibtex'):
+    """
+    Serialize the entries one at a time in the given format.
+
+    :param entries: iterable of :class:`~zotero_bibtize.zotero_bibtize.BibEntry`
+    :param str output_format: one of :data:`OUTPUT_FORMATS`
+    :returns: iterator over the strings to be written
+    """
+    if output_format == 'bibtex':
+        return (str(bibentry) for bibentry in entries)
+    if output_format == 'jsonl':
+        return (_json_line(entry_record(bibentry)) for bibentry in entries)
+    if output_format == 'csl-json':
+        return _csl_json_array(entries)
+    raise Exception("unknown output format '{}' (allowed formats are {})"
+                    .format(output_format, ", ".join(OUTPUT_FORMATS)))
+
+
+def entry_record(bibentry):
+    """JSON record of the entry type, key and fields."""
+    return {'type': bibentry.type, 'key': bibentry.key,
+            'fields': dict(bibentry.fields)}
+
+
+def csl_item(bibentry):
+    """
+    CSL-JSON item of the entry.
+
+    Field contents are used as they are, i.e. LaTeX contents are kept.
+    Fields without a CSL counterpart are skipped.
+    """
+    fields = bibentry.fields
+    item = {'id': bibentry.key,
+            'type': CSL_TYPES.get(bibentry.type.lower(), 'document')}
+    for (label, content) in fields.items():
+        variable = CSL_VARIABLES.get(label.lower())
+        if variable is not None and content and variable not in item:
+            item[variable] = content
+    for role in ['author', 'editor']:
+        if fields.get(role):
+            item[role] = [csl_name(name) for name in parse_names(fields[role])]
+    if fields.get('pages'):
+        item['page'] = re.sub(r"-+", '-', fields['pages'])
+    year = fields.get('year')
+    if year and year.strip().isdigit():
+        date_parts = [int(year)]
+        month = (fields.get('month') or '').strip().lower()[:3]
+        if month in MONTHS:
+            date_parts.append(MONTHS.index(month) + 1)
+        elif month.isdigit():
+            date_parts.append(int(month))
+        item['issued'] = {'date-parts': [date_parts]}
+    return item
+
+
+def csl_name(name):
+    """CSL name of the given :class:`~zotero_bibtize.names.Name`."""
+    (first, von, last, jr) = (re.sub(r"[{}]", '', part) for part in name)
+    if not (first or von or jr) and name.last.startswith('{'):
+        return {'literal': last}  # corporate names, e.g. {Barnes and Noble}
+    csl = {'family': last}
+    if first:
+        csl['given'] = first
+    if von:
+        csl['non-dropping-particle'] = von
+    if jr:
+        csl['suffix'] = jr
+    return csl
+
+
+def _json_line(record):
+    return json.dumps(record) + '\n'
+
+
+def _csl_json_array(entries):
+    """CSL-JSON array written with one item per line."""
+    yield '[\n'
+    separator = ''
+    for bibentry in entries:
+        yield separator + json.dumps(csl_item(bibentry))
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def iter_jsonl_entries(jsonl_file):
+    """
+    Iterate over the entries stored in a JSON Lines file.
+
+    Records are read one line at a time such that only a single entry has to
+    be kept in memory.
+
+    :param str jsonl_file: path to a file written in `jsonl` format
+    :returns: iterator over the :class:`~zotero_bibtize.zotero_bibtize.BibEntry`
+        instances
+    """
+    with open(jsonl_file, 'r') as infile:
+        for line in infile:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield BibEntry.from_fields(record['type'], record['key'],
+                                       record['fields'].items())
+
+
+def iter_csl_items(csl_json_file):
+    """
+    Iterate over the items stored in a CSL-JSON file.
+
+    Files written in `csl-json` format (i.e. with one item per line) are
+    read one line at a time, other (e.g. pretty-printed) CSL-JSON files are
+    loaded at once.
+
+    :param str csl_json_file: path to the CSL-JSON file
+    :returns: iterator over the CSL items (dicts)
+    """
+    with open(csl_json_file, 'r') as infile:
+        if infile.readline().strip() == '[':
+            items = _csl_lines(infile)
+            try:
+                first = next(items, None)
+            except ValueError:  # not written with one item per line
+                pass
+            else:
+                if first is not None:
+                    yield first
+                    yield from items
+                return
+        infile.seek(0)
+        yield from json.load(infile)
+
+
+def _csl_lines(infile):
+    """Parse the lines of a CSL-JSON array written with one item per line."""
+    for line in infile:
+        line = line.strip().rstrip(',')
+        if line and line != ']':
+            yield json.loads(line)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+
+import collections
+import functools
+import re
+
+
+# default maximal number of parsed names kept in the cache
+DEFAULT_NAME_CACHE_SIZE = 65536
+
+# braces (skipping escaped ones) and the `and` separating names of a list
+_NAME_LIST_TOKEN_REGEX = re.compile(r"\\[{}]|[{}]|\s+and\s+", re.IGNORECASE)
+# braces (skipping escaped ones), commas and word separators of a name
+_NAME_TOKEN_REGEX = re.compile(r"\\[{}]|[{},]|[\s~]+")
+# control sequence at the start of a special char, e.g. {\"a} or {\ss}
+_CONTROL_SEQUENCE_REGEX = re.compile(r"\\([A-Za-z]+|.)")
+
+
+class Name(collections.namedtuple('Name', ['first', 'von', 'last', 'jr'])):
+    """
+    A single parsed BibTeX name.
+
+    The name parts are strings (empty if the part is not present), e.g.
+    `van Beethoven, Jr, Ludwig` is parsed into `Name(first='Ludwig',
+    von='van', last='Beethoven', jr='Jr')`.
+    """
+    __slots__ = ()
+
+    @property
+    def surname(self):
+        """The von and last part of the name."""
+        return " ".join(part for part in (self.von, self.last) if part)
+
+    def __str__(self):
+        parts = [self.surname]
+        if self.jr:
+            parts.append(self.jr)
+        if self.first:
+            parts.append(self.first)
+        return ", ".join(parts)
+
+
+def split_names(names, max_names=None):
+    """
+    Split a BibTeX name list at the `and` separating the names.
+
+    Only an `and` surrounded by whitespace outside of braces separates names,
+    i.e. names like `{Barnes and Noble}` are kept.
+
+    :param str names: the name list, e.g. the contents of an author field
+    :param int max_names: stop after the first `max_names` names (if not
+        given all names are returned)
+    :returns: list of the (stripped) name strings
+    """
+    name_list = []
+    depth = 0
+    start = 0
+    for match in _NAME_LIST_TOKEN_REGEX.finditer(names):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth = max(0, depth - 1)
+        elif depth == 0 and not token.startswith('\\'):
+            name = names[start:match.start()].strip()
+            start = match.end()
+            if name:
+                name_list.append(name)
+            if max_names is not None and len(name_list) >= max_names:
+                return name_list
+    name = names[start:].strip()
+    if name:
+        name_list.append(name)
+    return name_list
+
+
+def name_parts(name):
+    """
+    Split a single name into its comma separated parts of words.
+
+    :param str name: the name string
+    :returns: list of word lists, one for every comma separated part
+    """
+    parts = [[]]
+    depth = 0
+    start = 0
+    for match in _NAME_TOKEN_REGEX.finditer(name):
+        token = match.group()
+        if token == '{':
+            depth += 1
+            continue
+        elif token == '}':
+            depth = max(0, depth - 1)
+            continue
+        elif depth > 0 or token.startswith('\\'):
+            continue
+        word = name[start:match.start()]
+        if word:
+            parts[-1].append(word)
+        if token == ',':
+            parts.append([])
+        start = match.end()
+    word = name[start:]
+    if word:
+        parts[-1].append(word)
+    return parts
+
+
+def is_lowercase(word):
+    """
+    Check if a name word starts with a lowercase letter.
+
+    The case is defined by the first letter outside of braces or by the
+    first letter of a special char like `{\\"a}`, other braced contents are
+    ignored. Words without any such letter (e.g. `{Van}`) are not lowercase.
+    """
+    depth = 0
+    for (index, char) in enumerate(word):
+        if char == '{':
+            if depth == 0 and word.startswith('\\', index + 1):
+                return _is_lowercase_special_char(word[index + 1:])
+            depth += 1
+        elif char == '}':
+            depth = max(0, depth - 1)
+        elif depth == 0 and char.isalpha():
+            return char.islower()
+    return False
+
+
+def _is_lowercase_special_char(special_char):
+    """Case of a special char, i.e. of `\\"a}` in `{\\"a}`."""
+    control_sequence = _CONTROL_SEQUENCE_REGEX.match(special_char)
+    for char in special_char[control_sequence.end():]:
+        if char == '}':
+            break
+        if char.isalpha():
+            return char.islower()
+    # the control sequence is the char itself, e.g. {\o} or {\AE}
+    return control_sequence.group(1).islower()
+
+
+@functools.lru_cache(maxsize=DEFAULT_NAME_CACHE_SIZE)
+def parse_name(name):
+    """
+    Parse a single BibTeX name.
+
+    The forms `First von Last`, `von Last, First` and `von Last, Jr, First`
+    are supported, the von part consists of the words starting with a
+    lowercase letter (cf. :func:`is_lowercase`). Parsed names are cached,
+    i.e. the same :class:`Name` instance is returned for recurring names.
+
+    :param str name: the name string, e.g. `van Hove, L.`
+    :returns: the parsed :class:`Name`
+    """
+    parts = name_parts(name)
+    if len(parts) == 1:
+        (words, jr, first) = (parts[0], [], [])
+        # the last word always belongs to the last name
+        lowercase = [i for i in range(len(words) - 1)
+                     if is_lowercase(words[i])]
+        if lowercase:
+            first = words[:lowercase[0]]
+            words = words[lowercase[0]:]
+            von_stop = lowercase[-1] - lowercase[0] + 1
+        else:
+            first = words[:-1]
+            words = words[-1:]
+            von_stop = 0
+    else:
+        (words, jr, first) = (parts[0], parts[1:-1], parts[-1])
+        jr = [word for part in jr for word in part]
+        lowercase = [i for i in range(len(words) - 1)
+                     if is_lowercase(words[i])]
+        von_stop = lowercase[-1] + 1 if lowercase else 0
+    return Name(first=" ".join(first), von=" ".join(words[:von_stop]),
+                last=" ".join(words[von_stop:]), jr=" ".join(jr))
+
+
+def parse_names(names, max_names=None):
+    """
+    Parse a BibTeX name list, e.g. the contents of an author field.
+
+    :param str names: the name list
+    :param int max_names: only parse the first `max_names` names (if not
+        given all names are parsed)
+    :returns: tuple of the parsed :class:`Name` instances
+    """
+    return tuple(parse_name(name) for name in split_names(names, max_names))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+
+import hashlib
+import json
+import os
+
+from zotero_bibtize.writer import write_entries
+
+
+def entry_identity(bibentry):
+    """
+    Hash identifying an entry independent of its position and key.
+
+    Entries are identified by their DOI if present, otherwise by their type,
+    authors, title, year and journal.
+
+    :param bibentry: the :class:`~zotero_bibtize.zotero_bibtize.BibEntry`
+    """
+    doi = bibentry.fields.get('doi')
+    if doi:
+        parts = ['doi', doi.strip().lower()]
+    else:
+        parts = [bibentry.type] + [bibentry.fields.get(field) or '' for field
+                                   in ('author', 'title', 'year', 'journal')]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def default_registry_file(bibtex_file):
+    """Path of the registry file stored next to the bibtex file."""
+    (root, name) = os.path.split(bibtex_file)
+    return os.path.join(root, '.{}.keys'.format(name))
+
+
+class KeyRegistry(object):
+    """
+    Registry of the keys assigned to entries.
+
+    Keys are stored by the identity of the entry (cf. :func:`entry_identity`)
+    such that entries keep their disambiguated keys on subsequent runs, even
+    if entries with colliding keys are added or removed. Duplicate entries
+    share the same identity, all keys assigned to an identity are therefore
+    kept (in the order they were assigned). Keys of removed entries are kept
+    in the registry to prevent them from being reassigned to other entries.
+
+    :param str registry_file: path of the file the registry is stored to (if
+        not given the registry is only kept in memory)
+    """
+    version = 1
+
+    def __init__(self, registry_file=None):
+        self.registry_file = registry_file
+        self.keys = {}
+        if registry_file is not None:
+            self.keys = self.load_registry_file(registry_file)
+        self.registered_keys = set(key for keys in self.keys.values()
+                                   for key in keys)
+
+    def load_registry_file(self, registry_file):
+        """Load registered keys (invalid or outdated files are ignored)."""
+        try:
+            with open(registry_file, 'r') as registry:
+                contents = json.load(registry)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(contents, dict):
+            return {}
+        if contents.get('version') != self.version:
+            return {}
+        return contents.get('keys', {})
+
+    def get(self, identity):
+        """Get the list of keys registered for the entry identity."""
+        return self.keys.get(identity, [])
+
+    def is_registered(self, key):
+        """Check if the key was assigned to any entry."""
+        return key in self.registered_keys
+
+    def register(self, identity, key):
+        """Register a key assigned to (one of) the entries of the identity."""
+        keys = self.keys.setdefault(identity, [])
+        if key not in keys:
+            keys.append(key)
+        self.registered_keys.add(key)
+
+    def save(self):
+        """Write the registry to the registry file."""
+        if self.registry_file is None:
+            return
+        contents = {'version': self.version, 'keys': self.keys}
+        write_entries([json.dumps(contents, sort_keys=True)],
+                      self.registry_file)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+
+import array
+import hashlib
+import io
+import os
+import struct
+import sys
+
+from zotero_bibtize.writer import AtomicFile, file_digest
+
+
+SNAPSHOT_MAGIC = b'ZBIBSNAP'
+SNAPSHOT_VERSION = 1
+
+# magic, version, source size, source mtime (ns), source sha1, number of
+# strings, number of integers in the entry records, length of the strings
+_HEADER = struct.Struct('<8sHQQ20sIII')
+# string index used for missing field contents
+_NONE = 0xFFFFFFFF
+
+
+def source_signature(source_file):
+    """Size, modification time (ns) and sha1 digest of the source file."""
+    stat = os.stat(source_file)
+    return (stat.st_size, stat.st_mtime_ns, file_digest(source_file).digest())
+
+
+class SourceReader(io.FileIO):
+    """Raw source file computing its signature while it is read."""
+    def __init__(self, source_file):
+        super(SourceReader, self).__init__(source_file, 'r')
+        self.mtime_ns = os.fstat(self.fileno()).st_mtime_ns
+        self.digest = hashlib.sha1()
+        self.size = 0
+
+    def readinto(self, buffer):
+        size = super(SourceReader, self).readinto(buffer)
+        if size:
+            self.digest.update(memoryview(buffer)[:size])
+            self.size += size
+        return size
+
+    def signature(self):
+        """Signature of the contents read (cf. :func:`source_signature`)."""
+        return (self.size, self.mtime_ns, self.digest.digest())
+
+
+def write_snapshot(snapshot_file, source_file, records, signature=None):
+    """
+    Write parsed entries to a binary snapshot file.
+
+    The snapshot consists of a header identifying the source file, a table
+    of all distinct strings (stored once as a single utf-8 string and the
+    offsets of the strings in it) and the entry records referencing the
+    strings by their index, i.e. `type, key, generated key, number of
+    fields, label 1, content 1, ...` stored as unsigned 32 bit integers.
+
+    :param str snapshot_file: path of the written snapshot
+    :param str source_file: path of the bibtex file the entries were parsed
+        from (stored as first string of the table)
+    :param records: iterable of (type, key, generated key, fields) tuples,
+        fields being a list of (label, content) pairs
+    :param signature: signature of the source file contents the entries
+        were parsed from (cf. :class:`SourceReader`, defaults to the
+        signature of the current contents)
+    """
+    if signature is None:
+        signature = source_signature(source_file)
+    (size, mtime_ns, digest) = signature
+    strings = {}
+
+    def index(string):
+        if string is None:
+            return _NONE
+        try:
+            return strings[string]
+        except KeyError:
+            strings[string] = len(strings)
+            return strings[string]
+
+    index(os.path.abspath(source_file))
+    integers = array.array('I')
+    for (entry_type, key, generated_key, fields) in records:
+        integers.extend((index(entry_type), index(key), index(generated_key),
+                         len(fields)))
+        for (label, content) in fields:
+            integers.append(index(label))
+            integers.append(index(content))
+    offsets = array.array('I', [0])
+    for string in strings:  # ordered by index
+        offsets.append(offsets[-1] + len(string))
+    blob = "".join(strings).encode('utf-8')
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        integers.byteswap()
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, size, mtime_ns,
+                          digest, len(strings), len(integers), len(blob))
+    _write_bytes([header, offsets.tobytes(), integers.tobytes(), blob],
+                 snapshot_file)
+
+
+def read_snapshot(snapshot_file, source_file=None, validate=True):
+    """
+    Read the entries stored in a snapshot file.
+
+    :param str snapshot_file: path of the snapshot
+    :param str source_file: bibtex file the snapshot is validated against
+        (defaults to the source file stored in the snapshot)
+    :param bool validate: check that the source file did not change since
+        the snapshot was written (same size and either the same
+        modification time or the same hash)
+    :returns: the source file stored in the snapshot and a list of (type,
+        key, generated key, fields) tuples
+    """
+    with open(snapshot_file, 'rb') as snapshot:
+        contents = snapshot.read()
+    if len(contents) < _HEADER.size:
+        raise Exception("Invalid snapshot file {}".format(snapshot_file))
+    (magic, version, size, mtime_ns, digest, num_strings, num_integers,
+     blob_size) = _HEADER.unpack_from(contents)
+    if magic != SNAPSHOT_MAGIC:
+        raise Exception("Invalid snapshot file {}".format(snapshot_file))
+    if version != SNAPSHOT_VERSION:
+        raise Exception("Unsupported snapshot version {} (expected {})"
+                        .format(version, SNAPSHOT_VERSION))
+    contents = memoryview(contents)
+    start = _HEADER.size
+    offsets = array.array('I')
+    offsets.frombytes(contents[start:start + 4 * (num_strings + 1)])
+    start += 4 * (num_strings + 1)
+    integers = array.array('I')
+    integers.frombytes(contents[start:start + 4 * num_integers])
+    start += 4 * num_integers
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        integers.byteswap()
+    blob = str(contents[start:start + blob_size], 'utf-8')
+    strings = [blob[offsets[i]:offsets[i + 1]] for i in range(num_strings)]
+    stored_source = strings[0]
+    if validate:
+        source = source_file if source_file is not None else stored_source
+        if not _is_unchanged(source, size, mtime_ns, digest):
+            raise Exception("Snapshot {} is outdated, the bibtex file {} "
+                            "changed".format(snapshot_file, source))
+    records = []
+    position = 0
+    while position < num_integers:
+        (entry_type, key, generated_key, num_fields) = \
+            integers[position:position + 4]
+        position += 4
+        fields = integers[position:position + 2 * num_fields]
+        position += 2 * num_fields
+        records.append((strings[entry_type], strings[key],
+                        strings[generated_key],
+                        [(strings[fields[i]], strings[fields[i + 1]] if
+                          fields[i + 1] != _NONE else None)
+                         for i in range(0, len(fields), 2)]))
+    return (stored_source, records)
+
+
+def _is_unchanged(source_file, size, mtime_ns, digest):
+    """Check the source file still has the given size and contents."""
+    try:
+        stat = os.stat(source_file)
+    except OSError:
+        return False
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    return file_digest(source_file).digest() == digest
+
+
+def _write_bytes(chunks, output_file):
+    """Atomically write the given byte chunks to the output file."""
+    with AtomicFile(output_file) as atomic:
+        outfile = io.BufferedWriter(atomic.raw)
+        for chunk in chunks:
+            outfile.write(chunk)
+        outfile.flush()
+        atomic.commit()
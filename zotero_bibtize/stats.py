@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+
+import collections
+import heapq
+import time
+
+
+class _NullPhase(object):
+    """Context manager doing nothing."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullStats(object):
+    """
+    Statistics collector doing nothing.
+
+    Used whenever statistics are disabled such that the instrumentation
+    hooks reduce to calls of empty methods.
+    """
+    enabled = False
+    _null_phase = _NullPhase()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def timed_iter(self, iterable, name):
+        return iterable
+
+    def timed_reader(self, fileobj, name='read'):
+        return fileobj
+
+    def count(self, name, number=1):
+        pass
+
+    def add_entry(self, index, key, seconds):
+        pass
+
+
+NULL_STATS = NullStats()
+
+
+class _Phase(object):
+    """Context manager accounting the time spent inside to a phase."""
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats.enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.exit()
+        return False
+
+
+class _TimedReader(object):
+    """File object wrapper accounting the time spent in `read` to a phase."""
+    def __init__(self, stats, fileobj, name):
+        self.stats = stats
+        self.fileobj = fileobj
+        self.name = name
+
+    def read(self, *args):
+        with self.stats.phase(self.name):
+            return self.fileobj.read(*args)
+
+
+class Stats(object):
+    """
+    Collect per-phase timings, counts and the slowest entries of a run.
+
+    Phases may be nested, in which case the time spent in the inner phase
+    is not accounted to the outer phase (i.e. phase times are exclusive
+    and add up to the total time spent in all phases).
+
+    :param int num_slowest: number of slowest entries to keep track of
+    """
+    enabled = True
+
+    def __init__(self, num_slowest=10):
+        self.num_slowest = num_slowest
+        self.times = collections.OrderedDict()
+        self.counts = collections.OrderedDict()
+        self.slowest = []  # heap of (seconds, index, key) tuples
+        self.start = time.perf_counter()
+        self._active = []
+        self._last = self.start
+
+    def _account(self):
+        """Account the time since the last switch to the active phase."""
+        now = time.perf_counter()
+        if self._active:
+            name = self._active[-1]
+            self.times[name] = self.times.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def enter(self, name):
+        """Start the phase with the given name."""
+        self._account()
+        self._active.append(name)
+
+    def exit(self):
+        """Stop the most recently started phase."""
+        self._account()
+        self._active.pop()
+
+    def phase(self, name):
+        """Context manager accounting the time spent inside to a phase."""
+        return _Phase(self, name)
+
+    def timed_iter(self, iterable, name):
+        """Account the time spent to get the items of iterable to a phase."""
+        iterator = iter(iterable)
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    def timed_reader(self, fileobj, name='read'):
+        """Wrap the file object to account time spent reading to a phase."""
+        return _TimedReader(self, fileobj, name)
+
+    def count(self, name, number=1):
+        """Increase the counter with the given name."""
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def add_entry(self, index, key, seconds):
+        """Record the processing time of a single entry."""
+        record = (seconds, index, key)
+        if len(self.slowest) < self.num_slowest:
+            heapq.heappush(self.slowest, record)
+        elif self.slowest and record > self.slowest[0]:
+            heapq.heapreplace(self.slowest, record)
+
+    def slowest_entries(self):
+        """List of (seconds, index, key) of the slowest entries."""
+        return sorted(self.slowest, reverse=True)
+
+    def report(self):
+        """Summary of the collected statistics."""
+        total = time.perf_counter() - self.start
+        lines = ["{:<24} {:>10} {:>8}".format('phase', 'time (s)', 'share')]
+        for (name, seconds) in self.times.items():
+            lines.append("{:<24} {:>10.4f} {:>8.1%}".format(
+                name, seconds, seconds / total if total else 0.0))
+        other = total - sum(self.times.values())
+        lines.append("{:<24} {:>10.4f} {:>8.1%}".format(
+            'other', other, other / total if total else 0.0))
+        lines.append("{:<24} {:>10.4f}".format('total', total))
+        if self.counts:
+            lines.append(", ".join("{}: {}".format(name, number)
+                                   for (name, number) in self.counts.items()))
+        if self.slowest:
+            lines.append("slowest entries:")
+            for (seconds, index, key) in self.slowest_entries():
+                lines.append("  #{:<8} {:<40} {:.6f} s".format(index, key,
+                                                               seconds))
+        return "\n".join(lines)
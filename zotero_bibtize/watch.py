@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import sys
+import time
+
+from zotero_bibtize.auxfile import read_citations
+from zotero_bibtize.cache import EntryCache
+from zotero_bibtize.formats import serialize_entries
+from zotero_bibtize.writer import write_entries
+from zotero_bibtize.zotero_bibtize import BibTexFile
+
+
+class BibTexWatcher(object):
+    """
+    Reprocess a bibtex file whenever it is modified.
+
+    The input file is polled for changes of its modification time or size.
+    Once a change was detected the file has to remain unchanged for the
+    `debounce` period and all braces have to be balanced (i.e. the file
+    was written completely) before it is processed. Parsed entries are kept
+    in memory such that only new or modified entries have to be parsed
+    again. If processing fails the file is not processed again before it
+    is modified.
+
+    :param str input_file: path to the watched bibtex file
+    :param str output_file: path to the file processed contents are written to
+    :param key_format: optional format used to generate entry keys
+    :param str omit_fields: comma separated list of fields to skip
+    :param int workers: number of processes used to parse modified entries
+    :param float interval: time between two polls of the input file (in s)
+    :param float debounce: time the input file has to remain unchanged
+        before it is processed (in s)
+    :param cache: optional :class:`~zotero_bibtize.cache.EntryCache` used to
+        keep parsed entries (defaults to an in-memory cache)
+    :param str disambiguation: strategy used to disambiguate colliding keys
+    :param key_registry: optional
+        :class:`~zotero_bibtize.registry.KeyRegistry` keeping assigned keys
+    :param str keep_fields: comma separated list of the only fields to keep
+    :param str aux_file: optional LaTeX .aux file, only the cited entries are
+        written (the .aux file is watched for changes as well)
+    :param str output_format: format of the output file (cf.
+        :data:`~zotero_bibtize.defaults.OUTPUT_FORMATS`)
+    """
+    def __init__(self, input_file, output_file, key_format=None,
+                 omit_fields=None, workers=1, interval=1.0, debounce=0.5,
+                 cache=None, disambiguation='position', key_registry=None,
+                 keep_fields=None, aux_file=None, output_format='bibtex'):
+        if os.path.abspath(input_file) == os.path.abspath(output_file):
+            raise Exception("Watching a file requires an output file which "
+                            "differs from the input file.")
+        self.input_file = input_file
+        self.output_file = output_file
+        self.key_format = key_format
+        self.omit_fields = omit_fields
+        self.keep_fields = keep_fields
+        self.workers = workers
+        self.interval = interval
+        self.debounce = debounce
+        self.cache = cache if cache is not None else EntryCache()
+        self.disambiguation = disambiguation
+        self.key_registry = key_registry
+        self.aux_file = aux_file
+        self.output_format = output_format
+        self.clock = time.monotonic
+        self.processed_signature = None
+        self.failed_signature = None
+        self.pending_signature = None
+        self.pending_since = None
+        # whether the output file changed when it was last processed
+        self.written = None
+
+    def file_signature(self):
+        """
+        Modification time and size of the input file (None if missing).
+
+        If an .aux file is given its modification time and size are added.
+        """
+        try:
+            stat = os.stat(self.input_file)
+            if self.aux_file is None:
+                return (stat.st_mtime_ns, stat.st_size)
+            aux_stat = os.stat(self.aux_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, aux_stat.st_mtime_ns,
+                aux_stat.st_size)
+
+    def is_complete(self):
+        """Check if all entries in the input file are complete."""
+        with open(self.input_file, 'rb') as bibfile:
+            contents = bibfile.read()
+        try:
+            BibTexFile.strip_down_entries(contents)
+        except Exception:
+            return False
+        return True
+
+    def poll(self):
+        """
+        Check the input file for changes and process it if required.
+
+        :returns: the processed :class:`BibTexFile` or None if the file was
+            not processed
+        """
+        signature = self.file_signature()
+        if signature is None or signature in (self.processed_signature,
+                                              self.failed_signature):
+            return None
+        now = self.clock()
+        if signature != self.pending_signature:
+            self.pending_signature = signature
+            self.pending_since = now
+            return None
+        if now - self.pending_since < self.debounce:
+            return None
+        if not self.is_complete():
+            return None  # wait for the file to be changed again
+        try:
+            bibliography = self.process()
+        except Exception:
+            self.failed_signature = signature
+            raise
+        self.processed_signature = signature
+        return bibliography
+
+    def process(self):
+        """Process the input file and write the results."""
+        citations = None
+        if self.aux_file is not None:
+            citations = read_citations(self.aux_file)
+        bibliography = BibTexFile(self.input_file, self.key_format,
+                                  self.omit_fields, workers=self.workers,
+                                  cache=self.cache,
+                                  disambiguation=self.disambiguation,
+                                  key_registry=self.key_registry,
+                                  keep_fields=self.keep_fields,
+                                  citations=citations)
+        self.written = write_entries(
+            serialize_entries(bibliography.entries, self.output_format),
+            self.output_file)
+        self.cache.save()
+        if self.key_registry is not None:
+            self.key_registry.save()
+        return bibliography
+
+    def run(self, callback=None, error_callback=None):
+        """
+        Watch the input file until interrupted.
+
+        Errors raised while processing the input file are reported and the
+        file is watched for further changes.
+
+        :param callback: optional callable called with every processed
+            :class:`BibTexFile`
+        :param error_callback: optional callable called with the exception
+            of every failed run (defaults to printing it to stderr)
+        """
+        if error_callback is None:
+            error_callback = self.report_error
+        try:
+            while True:
+                try:
+                    bibliography = self.poll()
+                except Exception as error:
+                    error_callback(error)
+                else:
+                    if bibliography is not None and callback is not None:
+                        callback(bibliography)
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+    def report_error(self, error):
+        """Print the error raised when processing the input file."""
+        sys.stderr.write("Failed to process {}: {}\n"
+                         .format(self.input_file, error))
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+
+import contextlib
+import functools
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+
+# default size of the buffer used when writing output files
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def write_entries(entries, output_file, serialize=str,
+                  buffer_size=DEFAULT_BUFFER_SIZE, skip_unchanged=True,
+                  backup_file=None):
+    """
+    Atomically write the given entries to the output file.
+
+    Entries are serialized one at a time and written through a buffered
+    file handle to a temporary file located in the same directory, which
+    replaces the output file only once all entries have been written. An
+    interrupted run therefore never leaves a truncated output file.
+
+    The written contents are hashed while writing, if they are identical to
+    the contents of the existing output file the output file is left
+    untouched (i.e. its modification time does not change).
+
+    :param entries: iterable of entries to be written
+    :param str output_file: path of the written file
+    :param serialize: callable returning the string representation of an
+        entry (defaults to `str`, i.e. the bibtex representation)
+    :param int buffer_size: size of the write buffer in bytes
+    :param bool skip_unchanged: keep the output file if its contents did not
+        change
+    :param str backup_file: path the existing output file is copied to
+        before it is replaced (no backup is made if it is unchanged)
+    :returns: True if the output file was written, False if it was unchanged
+    """
+    with AtomicFile(output_file, raw_class=_HashingFileIO) as atomic:
+        raw = atomic.raw
+        outfile = io.TextIOWrapper(io.BufferedWriter(raw, buffer_size))
+        for entry in entries:
+            outfile.write(serialize(entry))
+        outfile.flush()
+        if skip_unchanged and _has_contents(atomic.output_file, raw.size,
+                                            raw.digest):
+            return False
+        atomic.commit(backup_file=backup_file)
+    return True
+
+
+class AtomicFile(object):
+    """
+    Temporary file atomically replacing an output file.
+
+    The temporary file is created in the directory of the output file and
+    replaces it once :meth:`commit` is called, i.e. after all contents have
+    been written. If the context is left without committing (e.g. due to
+    an error) the temporary file is removed and the output file is kept.
+    Buffered handles wrapping :attr:`raw` have to be flushed before the
+    temporary file is committed.
+
+    :param str output_file: path of the replaced file
+    :param raw_class: :class:`io.FileIO` (sub)class used as raw handle of
+        the temporary file
+    """
+    def __init__(self, output_file, raw_class=io.FileIO):
+        self.output_file = os.path.abspath(output_file)
+        directory, name = os.path.split(self.output_file)
+        handle, self.temp_file = tempfile.mkstemp(prefix='.{}.'.format(name),
+                                                  suffix='.tmp', dir=directory)
+        try:
+            self.raw = raw_class(handle, 'w')
+        except BaseException:
+            os.close(handle)
+            os.unlink(self.temp_file)
+            raise
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.committed:
+            self.discard()
+
+    def commit(self, backup_file=None):
+        """
+        Replace the output file by the temporary file.
+
+        The written contents are synced to disk and the temporary file gets
+        the permissions of the output file before replacing it.
+
+        :param str backup_file: path the existing output file is copied to
+            before it is replaced
+        """
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+        _copy_permissions(self.output_file, self.temp_file)
+        if backup_file is not None and os.path.exists(self.output_file):
+            shutil.copyfile(self.output_file, backup_file)
+        os.replace(self.temp_file, self.output_file)
+        self.committed = True
+
+    def discard(self):
+        """Remove the temporary file (keeping the output file)."""
+        self.raw.close()
+        # the temp file may already be gone, do not hide the actual error
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.temp_file)
+
+
+def file_digest(path, chunk_size=DEFAULT_BUFFER_SIZE):
+    """Hash of the contents of the given file (read chunkwise)."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest
+
+
+def _has_contents(path, size, digest):
+    """Check if the file has the given size and contents hash."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return file_digest(path).digest() == digest.digest()
+    except OSError:
+        return False
+
+
+class _HashingFileIO(io.FileIO):
+    """Raw file hashing and counting the bytes written to it."""
+    def __init__(self, handle, mode='w'):
+        super(_HashingFileIO, self).__init__(handle, mode)
+        self.digest = hashlib.sha1()
+        self.size = 0
+
+    def write(self, data):
+        written = super(_HashingFileIO, self).write(data)
+        if written:
+            self.digest.update(memoryview(data)[:written])
+            self.size += written
+        return written
+
+
+def _copy_permissions(output_file, temp_file):
+    """Apply the permissions the output file would have to the temp file."""
+    if os.path.exists(output_file):
+        shutil.copymode(output_file, temp_file)
+    else:  # temporary files are only accessible by the owner
+        os.chmod(temp_file, 0o666 & ~_umask())
+
+
+@functools.lru_cache(maxsize=None)
+def _umask():
+    """
+    The umask of the process, determined once.
+
+    The umask is read from /proc if available. Otherwise it can only be
+    read by setting it, which briefly changes the mode of files created by
+    other threads and is therefore done only once.
+    """
+    try:
+        with open('/proc/self/status', 'r') as status:
+            for line in status:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
@@ -1,91 +1,408 @@
 # -*- coding: utf-8 -*-
 
 
+import io
+import os
 import re
+import json
+import mmap
+import time
+import locale
+import itertools
 import collections
+import functools
+import collections.abc
 
-from zotero_bibtize.bibkey_formatter import KeyFormatter
+from zotero_bibtize.auxfile import key_candidates
+from zotero_bibtize.bibkey_formatter import CompiledKeyFormat
+from zotero_bibtize.defaults import DISAMBIGUATION_STRATEGIES
+from zotero_bibtize.names import parse_names
+from zotero_bibtize.registry import entry_identity
+from zotero_bibtize.snapshot import (SourceReader, read_snapshot,
+                                     write_snapshot)
+from zotero_bibtize.stats import NULL_STATS
+
+
+# default number of characters read at once when streaming bibtex files
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# default number of entries sent to a worker process at once
+DEFAULT_BATCH_SIZE = 256
+
+# the small token regexes below are compiled at import (about 0.5 ms in
+# total) as they are used in the innermost loops of the parser
+
+# structural characters of bibtex files
+_STRUCTURE_REGEX = re.compile(r"[@{}]")
+_BYTES_STRUCTURE_REGEX = re.compile(rb"[@{}]")
+
+# structural characters of a bibtex entry content
+_ENTRY_TOKEN_REGEX = re.compile(r'[{}",=]')
+# same for raw (still escaped) entries where escaped braces are skipped
+_RAW_ENTRY_TOKEN_REGEX = re.compile(r'\\[{}]|[{}",=]')
+
+# suffixes appended to colliding keys
+_KEY_SUFFIX_REGEX = re.compile(r"[a-z]*")
+
+# escape sequences added by Zotero and the characters they represent
+_UNESCAPE_MAP = {
+    r"{\textbar}": "|",
+    r"{\textless}": "<",
+    r"{\textgreater}": ">",
+    r"{\textasciitilde}": "~",
+    r"{\textasciicircum}": "^",
+    r"{\textbackslash}": "\\",
+    r"\{\vphantom{\}}": "{",
+    r"\vphantom{\{}\}": "}",
+    r"\#": "#",
+    r"\%": "%",
+    r"\&": "&",
+    r"\$": "$",
+    r"\_": "_",
+    r"\{": "{",
+    r"\}": "}",
+}
+
+
+# escaped braces which turn into a single brace if preceded by a backslash
+_ESCAPED_OPEN, _ESCAPED_CLOSE = r"\{\vphantom{\}}", r"\vphantom{\{}\}"
+
+
+@functools.lru_cache(maxsize=None)
+def _unescape_regex():
+    """
+    Compile the regex matching all sequences to be unescaped at once.
+
+    At every position matches are tried in the following order: capitalized
+    words enclosed by (possibly escaped) braces, backslashes followed by
+    escaped special chars and finally the plain escape sequences. This
+    reproduces the results obtained by removing Zotero escapes, special char
+    escapes and braces around capitalized words one after another. The
+    alternatives are grouped by their first char such that the regex engine
+    is able to skip quickly to the next possible match. The regex is
+    compiled once on first use.
+    """
+    escaped_open = re.escape(_ESCAPED_OPEN)
+    escaped_close = re.escape(_ESCAPED_CLOSE)
+    backslash = re.escape(r"\textbackslash}")
+    # opening braces must not be the start of one of Zotero's escapes
+    not_escape = (r"(?!\\text(?:bar|less|greater|asciitilde|asciicircum|"
+                  r"backslash)\})")
+    # capitalized words possibly containing escaped underscores
+    word = r"([A-Z]\w*(?:(?:\\_|\{{{}_)\w*)*)".format(backslash)
+    closing = [r"{\textbackslash}" + _ESCAPED_CLOSE, "\\" + _ESCAPED_CLOSE,
+               _ESCAPED_CLOSE, r"{\textbackslash}}", r"\}", r"}"]
+    closing = "(?:{})".format("|".join(map(re.escape, closing)))
+    # all sequences starting with an opening brace
+    brace_sequences = [
+        r"(?:{}(?:{}|\{{))?{}{}".format(backslash, escaped_open, word,
+                                        closing),
+        r"{}(?:{}|{}|[#%&$_}}]|\{{{})".format(backslash, escaped_open,
+                                             escaped_close, not_escape),
+        r"\\text(?:bar|less|greater|asciitilde|asciicircum|backslash)\}",
+    ]
+    # all sequences starting with a backslash
+    backslash_sequences = [
+        r"(?:{}|\{{(?:{})?){}{}".format(escaped_open,
+                                        re.escape(r"\vphantom{\}}"), word,
+                                        closing),
+        escaped_open,
+        escaped_close,
+        re.escape(_ESCAPED_OPEN[1:]),
+        re.escape(_ESCAPED_CLOSE[1:]),
+        r"[#%&$_}}]|\{{{}".format(not_escape),
+    ]
+    return re.compile(r"\{{(?:{})|\\(?:{})".format(
+        "|".join(brace_sequences), "|".join(backslash_sequences)))
+
+
+@functools.lru_cache(maxsize=None)
+def _field_set(fields):
+    """Frozen set of omitted (or kept) fields shared by all entries."""
+    if fields is None:
+        return frozenset()
+    return frozenset(fields.split(','))
 
 
 class BibEntry(object):
-    def __init__(self, bibtex_entry_string, key_format=None, omit_fields=None):
+    """
+    A single parsed bibtex entry.
+
+    The raw entry string is only kept if `keep_raw` is set, otherwise it is
+    dropped once the entry is parsed to keep the memory footprint small.
+    Fields listed in `omit_fields` or missing in `keep_fields` (if given)
+    are skipped without being decoded, they are still used to generate the
+    key though.
+    """
+    __slots__ = ('type', 'key', 'fields', 'fields_to_omit', 'fields_to_keep',
+                 '_raw')
+
+    def __init__(self, bibtex_entry_string, key_format=None, omit_fields=None,
+                 stats=None, keep_raw=False, lazy=False, keep_fields=None):
+        if stats is None:
+            stats = NULL_STATS
         # check for fields not required
-        self.fields_to_omit = []
-        if omit_fields is not None:
-            self.fields_to_omit = omit_fields.split(',')
-        self._raw = bibtex_entry_string
-        entry_type, entry_key, entry_fields = self.entry_fields(self._raw)
+        self.fields_to_omit = _field_set(omit_fields)
+        self.fields_to_keep = None
+        if keep_fields is not None:
+            self.fields_to_keep = _field_set(keep_fields)
+        self._raw = bibtex_entry_string if keep_raw else None
+        filtered = bool(self.fields_to_omit) or keep_fields is not None
+        if lazy or filtered:
+            # fields are located on the raw entry string such that only the
+            # fields actually used have to be unescaped
+            entry_type, entry_key, entry_fields = self.lazy_entry_fields(
+                bibtex_entry_string, stats)
+        else:
+            entry_type, entry_key, entry_fields = self.entry_fields(
+                bibtex_entry_string, stats)
         # set internal variables
         self.type = entry_type
         if key_format is not None:
-            key_formatter = KeyFormatter(entry_fields, entry_type=entry_type)
-            self.key = key_formatter.generate_key(key_format)
+            key_format = compile_key_format(key_format)
+            with stats.phase('keys'):
+                self.key = key_format.generate_key(entry_fields, entry_type)
         else:
             self.key = entry_key
+        if filtered:
+            entry_fields = self.filter_fields(entry_fields, lazy, stats)
         self.fields = entry_fields
-        
-    def entry_fields(self, bibtex_entry_string):
+
+    @classmethod
+    def from_fields(cls, entry_type, entry_key, entry_fields, omit_fields=None,
+                    bibtex_entry_string=None, keep_fields=None):
+        """
+        Create an entry from already parsed contents.
+
+        :param str entry_type: the bibtex entry type
+        :param str entry_key: the bibtex key of the entry
+        :param entry_fields: iterable of (label, content) pairs
+        :param str bibtex_entry_string: optional raw entry string to keep
+        """
+        bibentry = cls.__new__(cls)
+        bibentry.fields_to_omit = _field_set(omit_fields)
+        bibentry.fields_to_keep = None
+        if keep_fields is not None:
+            bibentry.fields_to_keep = _field_set(keep_fields)
+        bibentry._raw = bibtex_entry_string
+        bibentry.type = entry_type
+        bibentry.key = entry_key
+        bibentry.fields = dict(entry_fields)
+        return bibentry
+
+    @property
+    def raw(self):
+        """The raw entry string (None unless kept on construction)."""
+        return self._raw
+
+    def is_field_wanted(self, label):
+        """Check if the field with the given label is kept in the entry."""
+        if label in self.fields_to_omit:
+            return False
+        return self.fields_to_keep is None or label in self.fields_to_keep
+
+    def filter_fields(self, fields, lazy=False, stats=None):
+        """
+        Remove unwanted fields from the lazily decoded fields.
+
+        :param fields: the :class:`LazyFields` of the entry
+        :param bool lazy: keep the remaining fields lazy (otherwise they are
+            decoded immediately)
+        """
+        if stats is None:
+            stats = NULL_STATS
+        wanted = [label for label in fields if self.is_field_wanted(label)]
+        if lazy:
+            return fields.subset(wanted)
+        with stats.phase('unescape'):
+            return dict((label, fields[label]) for label in wanted)
+
+    def entry_fields(self, bibtex_entry_string, stats=None):
         """Disassemble the bibtex entry contents."""
         # revert zotero escaping
-        etype, ekey, econtent = self.bibtex_entry_contents(bibtex_entry_string)
-        # disassemble the field entries (use ordered dict to assure output
-        # order matches the input order for python versions < 3.6, this is not
-        # of practical importance for generated bib-files but allows for 
-        # easier tests based on file comparison)
-        fields = collections.OrderedDict()
-        for field in econtent:
-            key, content = self.field_label_and_contents(field)
+        etype, ekey, econtent = self.bibtex_entry_contents(bibtex_entry_string,
+                                                           stats)
+        # disassemble the field entries
+        fields = {}
+        for (key, content) in econtent:
             # skip if field was set to be omitted
-            if key in self.fields_to_omit: continue 
+            if not self.is_field_wanted(key): continue 
             fields[key] = content
         return etype, ekey, fields
 
+    def lazy_entry_fields(self, bibtex_entry_string, stats=None):
+        """
+        Disassemble the bibtex entry without decoding the field contents.
+
+        Fields are located on the raw entry string and only unescaped when
+        they are accessed for the first time.
+
+        :returns: entry type, entry key and a :class:`LazyFields` mapping
+        """
+        if stats is None:
+            stats = NULL_STATS
+        with stats.phase('fields'):
+            raw_entry = bibtex_entry_string.strip()
+            entry_match = re.match(r'^\@([\s\S]*?)\{([\s\S]*)\}$', raw_entry)
+            entry_type, entry_content = entry_match.group(1, 2)
+            key_stop, field_spans = self.field_spans(entry_content,
+                                                     _RAW_ENTRY_TOKEN_REGEX)
+            entry_key = self.unescape_bibtex_entry_string(
+                entry_content[:key_stop]).replace('\n', '')
+            spans = {}
+            for (field_start, separator, field_stop) in field_spans:
+                if separator is None:
+                    continue  # trailing comma after the last field
+                label = entry_content[field_start:separator]
+                label = label.replace('\n', '').strip()
+                spans[label] = (separator + 1, field_stop)
+        return (entry_type, entry_key, LazyFields(entry_content, spans))
+
     def field_label_and_contents(self, field):
         """Extract the field label and the corresponding content."""
-        field, count = re.subn(r'^(\s*)|(\s*)$', '', field)
-        # needs a separate expression for matching months which are
-        # not exported with surrounding braces...
-        regex = r'^([\s\S]*?)\s+\=\s+(?:\{([\s\S]*)\}|([\s\S]*)),*?$'
-        fmatch = re.match(regex, field)
-        field_key = fmatch.group(1)
-        field_content = fmatch.group(2) or fmatch.group(3)
-        return field_key, field_content
-
-    def bibtex_entry_contents(self, raw_entry_string):
+        label, _, content = field.partition('=')
+        return self._label_and_content(label, content)
+
+    @staticmethod
+    def _label_and_content(label, content):
+        """Clean up raw label and content strings of a single field."""
+        label = label.replace('\n', '').strip()
+        content = content.replace('\n', '').strip()
+        # months are not exported with surrounding braces...
+        if content.startswith('{') and content.endswith('}'):
+            content = content[1:-1]
+        return label, content or None
+
+    def bibtex_entry_contents(self, raw_entry_string, stats=None):
         """Unescape the entry string and get the contained contents."""
-        # revert zotero escpaing and remove trailing / leading whitespaces
-        unescaped = self.unescape_bibtex_entry_string(raw_entry_string)
-        unescaped = re.sub(r'^(\s*)|(\s*)$', '', unescaped)
-        entry_match = re.match(r'^\@([\s\S]*?)\{([\s\S]*?)\}$', unescaped)
-        entry_type, entry_content = entry_match.group(1, 2)
-        # check if the unescaped bibtex entry is valid
-        if not self._is_balanced(entry_content):
-            raise Exception("Found braces unbalanced after unescaping of "
-                            "BibTeX entry. The offending entry was\n\n"
-                            "{}".format(raw_entry_string))
-        entry_content = []
-        tmp_entry = ''
-        for part in re.split(r",", entry_match.group(2)):
-            tmp_entry += re.sub(r'\n', '', part)
-            # since _is_balanced also returns True for strings containing
-            # no braces at this also works for the initial bibentry key
-            if self._is_balanced(tmp_entry):
-                entry_content.append(re.sub(r'\n', '', tmp_entry))
-                tmp_entry = ''
-            else:  # re-introduce comma if unbalanced
-                tmp_entry += ','
-        # remove possible emtpy entry at the end of the array
-        if not entry_content[-1]:
-            entry_content = entry_content[:-1]
-        # return type, original zotero key and the actual content list 
-        return (entry_type, entry_content[0], entry_content[1:])
+        if stats is None:
+            stats = NULL_STATS
+        with stats.phase('unescape'):
+            # revert zotero escpaing and remove trailing / leading whitespaces
+            unescaped = self.unescape_bibtex_entry_string(raw_entry_string)
+            unescaped = re.sub(r'^(\s*)|(\s*)$', '', unescaped)
+            entry_match = re.match(r'^\@([\s\S]*?)\{([\s\S]*?)\}$',
+                                   unescaped)
+            entry_type, entry_content = entry_match.group(1, 2)
+            # check if the unescaped bibtex entry is valid
+            if not self._is_balanced(entry_content):
+                raise Exception("Found braces unbalanced after unescaping of "
+                                "BibTeX entry. The offending entry was\n\n"
+                                "{}".format(raw_entry_string))
+        with stats.phase('fields'):
+            entry_key, entry_fields = self.tokenize_entry_content(
+                entry_content)
+        # return type, original zotero key and the actual (label, content)
+        # pairs
+        return (entry_type, entry_key, entry_fields)
+
+    def tokenize_entry_content(self, entry_content):
+        """
+        Split the entry content into the entry key and its fields.
+
+        The content is walked only once while keeping track of the brace
+        depth and the quote state, such that commas and equal signs inside
+        of field contents are not mistaken for field separators.
+
+        :param str entry_content: entry content found between the outermost
+            braces, i.e. of the form `key, label1 = {content1}, ...`
+        :returns: the entry key and a list of (label, content) tuples
+        """
+        key_stop, field_spans = self.field_spans(entry_content)
+        entry_key = entry_content[:key_stop].replace('\n', '')
+        entry_fields = []
+        for (field_start, separator, field_stop) in field_spans:
+            if separator is None:
+                continue  # trailing comma after the last field
+            label = entry_content[field_start:separator]
+            content = entry_content[separator+1:field_stop]
+            entry_fields.append(self._label_and_content(label, content))
+        return entry_key, entry_fields
+
+    def field_spans(self, entry_content, token_regex=_ENTRY_TOKEN_REGEX):
+        """
+        Locate the entry key and the fields in the entry content.
+
+        :param str entry_content: entry content found between the outermost
+            braces
+        :param token_regex: regex matching the structural chars (escaped
+            chars matched by the regex are skipped)
+        :returns: the end of the entry key and a list of (start, separator,
+            stop) indices of all fields (separator is None for empty fields
+            following a trailing comma)
+        """
+        spans = []
+        field_start = 0
+        separator = None  # location of the label / content separator
+        stack = 0
+        in_quotes = False
+        for match in token_regex.finditer(entry_content):
+            char = match.group()
+            if char[0] == '\\':
+                continue  # escaped brace
+            if char == '{':
+                stack += 1
+            elif char == '}':
+                stack -= 1
+            elif stack != 0:
+                continue
+            elif char == '"':
+                in_quotes = not in_quotes
+            elif in_quotes:
+                continue
+            elif char == '=':
+                if separator is None:
+                    separator = match.start()
+            else:  # char == ','
+                spans.append((field_start, separator, match.start()))
+                field_start = match.end()
+                separator = None
+        if stack != 0:
+            raise Exception("Found braces unbalanced in BibTeX entry "
+                            "content\n\n{}".format(entry_content))
+        spans.append((field_start, separator, len(entry_content)))
+        # the first span always contains the bibtex key
+        (_, _, key_stop), *field_spans = spans
+        for (field_start, separator, field_stop) in field_spans:
+            # allow for trailing commas after the last field
+            if separator is None and \
+                    entry_content[field_start:field_stop].strip():
+                raise Exception("Unable to identify the field label of "
+                                "'{}'".format(entry_content[field_start:
+                                                            field_stop]))
+        return key_stop, field_spans
 
     def unescape_bibtex_entry_string(self, entry):
-        """Remove zotero escapes and additional braces."""
-        entry = self.remove_zotero_escaping(entry)
-        entry = self.remove_special_char_escaping(entry)
-        entry = self.remove_curly_from_capitalized(entry)
-        return entry
+        """
+        Remove zotero escapes and additional braces.
+
+        All escape sequences are removed in a single pass, the result is
+        identical to the one obtained by successively calling
+        :meth:`remove_zotero_escaping`, :meth:`remove_special_char_escaping`
+        and :meth:`remove_curly_from_capitalized`.
+        """
+        return _unescape_regex().sub(self._unescape_match, entry)
+
+    @staticmethod
+    def _unescape_match(match):
+        """Unescaped replacement for a match of :func:`_unescape_regex`."""
+        # capitalized words are the only groups captured by the regex
+        if match.lastindex is not None:
+            word = match.group(match.lastindex)
+            if '\\' in word:  # word may contain escaped underscores
+                word = word.replace(r"{\textbackslash}_", "_")
+                word = word.replace(r"\_", "_")
+            return word
+        escaped = match.group()
+        unescaped = _UNESCAPE_MAP.get(escaped)
+        if unescaped is not None:
+            return unescaped
+        # otherwise a backslash combined with an escaped special char
+        if escaped.endswith(_ESCAPED_OPEN):
+            return '{'
+        if escaped.endswith(_ESCAPED_CLOSE):
+            return '}'
+        return escaped[-1]
 
     def remove_zotero_escaping(self, entry):
         # first we remove the escape sequences defined by Zotero
@@ -127,7 +444,8 @@ class BibEntry(object):
             entry = entry.replace(word, word.lstrip("{").rstrip("}"))
         return entry
 
-    def _is_balanced(self, string):
+    @staticmethod
+    def _is_balanced(string):
         """
         Check if opening and closing curly braces are balanced in string.
 
@@ -145,28 +463,435 @@ class BibEntry(object):
         return ",\n".join(content) + '\n}\n'
 
 
+class LazyFields(collections.abc.MutableMapping):
+    """
+    Mapping of field labels to field contents decoded on first access.
+
+    :param str entry_content: the raw (escaped) entry content
+    :param spans: mapping of field labels to the (start, stop) indices of
+        the raw field contents in `entry_content`
+    """
+    __slots__ = ('_content', '_spans', '_decoded')
+
+    def __init__(self, entry_content, spans):
+        self._content = entry_content
+        self._spans = spans
+        self._decoded = {}
+
+    def __getitem__(self, label):
+        try:
+            return self._decoded[label]
+        except KeyError:
+            pass
+        (start, stop) = self._spans[label]
+        content = self.decode_field(self._content[start:stop])
+        self._decoded[label] = content
+        return content
+
+    def __setitem__(self, label, content):
+        if label not in self._spans:
+            self._spans[label] = None
+        self._decoded[label] = content
+
+    def __delitem__(self, label):
+        del self._spans[label]
+        self._decoded.pop(label, None)
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, list(self._spans))
+
+    def subset(self, labels):
+        """New mapping only containing the fields with the given labels."""
+        subset = LazyFields(self._content,
+                            dict((l, self._spans[l]) for l in labels))
+        for label in labels:
+            if label in self._decoded:
+                subset._decoded[label] = self._decoded[label]
+        return subset
+
+    @staticmethod
+    def decode_field(raw_content):
+        """Unescape the raw field content."""
+        content = _unescape_regex().sub(BibEntry._unescape_match, raw_content)
+        if not BibEntry._is_balanced(content):
+            raise Exception("Found braces unbalanced after unescaping of "
+                            "BibTeX field. The offending field was\n\n"
+                            "{}".format(raw_content))
+        return BibEntry._label_and_content('', content)[1]
+
+
+def _entry_key(bibentry):
+    return bibentry.key
+
+
+def _entry_doi(bibentry):
+    return bibentry.fields.get('doi') or None
+
+
+def _normalize_doi(doi):
+    return doi.strip().lower()
+
+
+def _entry_type(bibentry):
+    return bibentry.type
+
+
+def _normalize_type(entry_type):
+    return entry_type.lower()
+
+
+def _entry_year(bibentry):
+    return bibentry.fields.get('year') or None
+
+
+def _normalize_year(year):
+    return str(year).strip()
+
+
+def _first_author(bibentry):
+    """Last name of the first author of the entry (None if not given)."""
+    authors = bibentry.fields.get('author')
+    if not authors:
+        return None
+    names = parse_names(authors, max_names=1)
+    return names[0].last if names else None
+
+
+def _normalize_name(name):
+    """Case insensitive name without braces."""
+    return re.sub(r"[{}]", '', name).casefold()
+
+
+# functions extracting the value of an entry stored in an index (None if
+# the entry is not indexed) and normalizing indexed and queried values
+_INDEXES = {
+    'key': (_entry_key, str),
+    'doi': (_entry_doi, _normalize_doi),
+    'type': (_entry_type, _normalize_type),
+    'year': (_entry_year, _normalize_year),
+    'author': (_first_author, _normalize_name),
+}
+
+
 class BibTexFile(object):
-    """Bibtext file contents"""
-    def __init__(self, bibtex_file, key_format=None, omit_fields=None):
+    """
+    Bibtext file contents
+
+    If `lazy` is set the field contents of the entries are only decoded
+    when they are accessed for the first time (cf. :class:`LazyFields`).
+    Colliding keys are disambiguated according to the `disambiguation`
+    strategy (cf. :meth:`resolve_unambiguous_keys`), keys registered in the
+    optional `key_registry` are kept.
+
+    Entries can be queried by key, DOI, entry type, year and the last name
+    of the first author (cf. :meth:`get`, :meth:`by_doi` and
+    :meth:`filter`). The required indexes are built on the first query and
+    dropped when entries are added or removed via :meth:`add_entry` and
+    :meth:`remove_entry` (if entries are modified otherwise
+    :meth:`invalidate_indexes` has to be called).
+
+    If a set of `citations` is given only the entries cited with these keys
+    are kept (cf. :meth:`cited_entry_strings`).
+    """
+    disambiguation = 'position'
+    key_registry = None
+    source_signature = None
+    _indexes = None
+
+    def __init__(self, bibtex_file, key_format=None, omit_fields=None,
+                 workers=1, cache=None, stats=None, lazy=False,
+                 disambiguation='position', key_registry=None,
+                 keep_fields=None, citations=None):
+        if disambiguation not in DISAMBIGUATION_STRATEGIES:
+            raise Exception("unknown disambiguation strategy '{}' (allowed "
+                            "strategies are {})".format(
+                                disambiguation,
+                                ", ".join(DISAMBIGUATION_STRATEGIES)))
         self.bibtex_file = bibtex_file
+        self.stats = stats if stats is not None else NULL_STATS
+        self.disambiguation = disambiguation
+        self.key_registry = key_registry
+        # parse and validate the key format only once for all entries
+        key_format = compile_key_format(key_format)
+        if key_format is not None:
+            fragment_cache = key_format.fragment_cache
+            (hits, misses) = (fragment_cache.hits, fragment_cache.misses)
         self.entries = []
         self.key_map = collections.defaultdict(list)
-        for (index, entry) in enumerate(self.parse_bibtex_entries()):
-            bibentry = BibEntry(entry, key_format=key_format, 
-                                omit_fields=omit_fields)
+        entries = self.parse_bibtex_entries()
+        indices = None  # indices of the parsed entries in the bibtex file
+        if citations is not None:
+            cited = list(self.stats.timed_iter(self.cited_entry_strings(
+                entries, key_format, citations), 'select'))
+            indices = [index for (index, _) in cited]
+            entries = [entry for (_, entry) in cited]
+        if cache is not None:
+            bibentries = self.parse_cached_entries(entries, cache, key_format,
+                                                  omit_fields, workers, lazy,
+                                                  keep_fields, indices)
+        else:
+            bibentries = parse_entries(entries, key_format, omit_fields,
+                                       workers, stats=self.stats,
+                                       indices=indices, lazy=lazy,
+                                       keep_fields=keep_fields)
+        for (index, bibentry) in enumerate(bibentries):
             self.entries.append(bibentry)
             self.key_map[bibentry.key].append(index)
-        self.resolve_unambiguous_keys()
+            self.stats.count('entries')
+            self.stats.count('fields', len(bibentry.fields))
+        # fragments cached in worker processes are not accounted
+        if key_format is not None:
+            self.stats.count('key fragment hits', fragment_cache.hits - hits)
+            self.stats.count('key fragment misses',
+                             fragment_cache.misses - misses)
+        with self.stats.phase('resolve keys'):
+            self.resolve_unambiguous_keys()
+        if citations is not None:
+            self.select_entries(lambda bibentry: bibentry.key in citations)
+
+    def save_snapshot(self, snapshot_file):
+        """
+        Store the parsed entries in a binary snapshot file.
+
+        The snapshot can be loaded via :meth:`load_snapshot` much faster than
+        parsing the bibtex file again (cf. :mod:`zotero_bibtize.snapshot`).
+        It is marked valid for the file contents the entries were parsed
+        from, even if the file changed in the meantime.
+
+        :param str snapshot_file: path of the written snapshot
+        """
+        generated_keys = {}
+        for (key, indices) in self.key_map.items():
+            for index in indices:
+                generated_keys[index] = key
+        records = ((bibentry.type, bibentry.key,
+                    generated_keys.get(index, bibentry.key),
+                    list(bibentry.fields.items()))
+                   for (index, bibentry) in enumerate(self.entries))
+        write_snapshot(snapshot_file, self.bibtex_file, records,
+                       self.source_signature)
+
+    @classmethod
+    def load_snapshot(cls, snapshot_file, bibtex_file=None, validate=True):
+        """
+        Load parsed entries from a snapshot file.
+
+        :param str snapshot_file: path of the snapshot
+        :param str bibtex_file: bibtex file the snapshot is validated against
+            (defaults to the file the snapshot was created from)
+        :param bool validate: raise if the bibtex file changed since the
+            snapshot was written
+        :returns: a :class:`BibTexFile` instance
+        """
+        (source_file, records) = read_snapshot(snapshot_file, bibtex_file,
+                                               validate)
+        bibliography = cls.__new__(cls)
+        bibliography.bibtex_file = (bibtex_file if bibtex_file is not None
+                                    else source_file)
+        bibliography.stats = NULL_STATS
+        bibliography.entries = []
+        bibliography.key_map = collections.defaultdict(list)
+        for (index, (entry_type, key, generated_key, fields)) in \
+                enumerate(records):
+            bibliography.entries.append(
+                BibEntry.from_fields(entry_type, key, fields))
+            bibliography.key_map[generated_key].append(index)
+        return bibliography
+
+    def cited_entry_strings(self, entry_strings, key_format, citations):
+        """
+        Select the raw entry strings which may be cited with the given keys.
+
+        To find the entries only the fields required to generate the keys
+        are decoded. All entries sharing a generated key with a cited entry
+        are selected such that colliding keys are disambiguated as if all
+        entries were processed.
+
+        :param entry_strings: iterable of the raw entry strings
+        :param key_format: the compiled key format (or None)
+        :param citations: the cited keys
+        :returns: iterator over the (index, raw entry string) pairs of the
+            selected entries, index being the position in `entry_strings`
+        """
+        candidates = key_candidates(citations)
+        for (index, entry) in enumerate(entry_strings):
+            bibentry = BibEntry(entry, key_format, lazy=True,
+                                stats=self.stats)
+            if bibentry.key in candidates:
+                yield (index, entry)
+
+    def index(self, name):
+        """
+        Get the index of the given name (built if not present yet).
+
+        :param str name: one of `key`, `doi`, `type`, `year` or `author`
+        :returns: dict mapping normalized values to the positions of the
+            entries in :attr:`entries`
+        """
+        if self._indexes is None:
+            self._indexes = {}
+        index = self._indexes.get(name)
+        if index is not None:
+            return index
+        (extract, normalize) = self.index_functions(name)
+        index = collections.defaultdict(list)
+        for (position, bibentry) in enumerate(self.entries):
+            value = extract(bibentry)
+            if value is not None:
+                index[normalize(value)].append(position)
+        index = self._indexes[name] = dict(index)
+        return index
+
+    @staticmethod
+    def index_functions(name):
+        """The (extract, normalize) functions of the given index."""
+        try:
+            return _INDEXES[name]
+        except KeyError:
+            raise Exception("unknown index '{}' (allowed indexes are {})"
+                            .format(name, ", ".join(sorted(_INDEXES))))
+
+    def lookup(self, name, value):
+        """Positions of the entries with the given value in the index."""
+        (_, normalize) = self.index_functions(name)
+        return self.index(name).get(normalize(value), [])
+
+    def invalidate_indexes(self):
+        """Drop all indexes such that they are rebuilt on the next query."""
+        self._indexes = None
+
+    def get(self, key, default=None):
+        """Get the entry with the given (final) key."""
+        positions = self.lookup('key', key)
+        return self.entries[positions[0]] if positions else default
+
+    def by_doi(self, doi, default=None):
+        """Get the (first) entry with the given DOI (case insensitive)."""
+        positions = self.lookup('doi', doi)
+        return self.entries[positions[0]] if positions else default
+
+    def filter(self, **criteria):
+        """
+        Get all entries matching the given criteria.
+
+        For instance `filter(type='article', year=2015, author='Lang')`
+        returns all articles published 2015 whose first author's last name
+        is Lang (types, DOIs and names are compared case insensitive).
+
+        :returns: list of the matching entries in the order of the file
+        """
+        matches = sorted((self.lookup(name, value) for (name, value)
+                          in criteria.items()), key=len)
+        if not matches:
+            return list(self.entries)
+        positions = set(matches[0])
+        for other in matches[1:]:
+            positions.intersection_update(other)
+        return [self.entries[position] for position in sorted(positions)]
+
+    def add_entry(self, bibentry):
+        """
+        Append an entry to the file contents.
+
+        Note that the key of the added entry is not disambiguated.
+        """
+        self.key_map[bibentry.key].append(len(self.entries))
+        self.entries.append(bibentry)
+        self.invalidate_indexes()
+
+    def remove_entry(self, bibentry):
+        """Remove the given entry from the file contents."""
+        self.select_entries(lambda other: other is not bibentry)
+
+    def select_entries(self, predicate):
+        """Only keep the entries for which the predicate is true."""
+        kept = [index for (index, bibentry) in enumerate(self.entries)
+                if predicate(bibentry)]
+        positions = {index: position for (position, index) in enumerate(kept)}
+        self.entries = [self.entries[index] for index in kept]
+        # the key map holds the generated keys (before disambiguation)
+        key_map = collections.defaultdict(list)
+        for (key, indices) in self.key_map.items():
+            indices = [positions[index] for index in indices
+                       if index in positions]
+            if indices:
+                key_map[key] = indices
+        self.key_map = key_map
+        self.invalidate_indexes()
+
+    def parse_cached_entries(self, entry_strings, cache, key_format=None,
+                             omit_fields=None, workers=1, lazy=False,
+                             keep_fields=None, indices=None):
+        """
+        Parse the raw entry strings reusing entries found in the cache.
+
+        Only entries missing in the cache are parsed, newly parsed entries
+        are added to the cache.
+
+        :param cache: the :class:`~zotero_bibtize.cache.EntryCache` instance
+        :param indices: optional indices of the entry strings in the bibtex
+            file reported in the statistics (defaults to their position)
+        """
+        settings = self.cache_settings(key_format, omit_fields, keep_fields)
+        if indices is None:
+            indices = itertools.count()
+        bibentries = []
+        missing = []  # (position, index, hash, raw string) of missing entries
+        for (index, entry) in zip(indices, entry_strings):
+            entry_hash = cache.entry_hash(entry, settings)
+            record = cache.get(entry_hash)
+            if record is None:
+                missing.append((len(bibentries), index, entry_hash, entry))
+                bibentries.append(None)
+            else:
+                bibentries.append(BibEntry.from_fields(
+                    *record, omit_fields=omit_fields,
+                    keep_fields=keep_fields))
+        parsed = parse_entries((entry for (_, _, _, entry) in missing),
+                               key_format, omit_fields, workers,
+                               stats=self.stats,
+                               indices=[index for (_, index, _, _) in missing],
+                               lazy=lazy, keep_fields=keep_fields)
+        for ((position, _, entry_hash, _), bibentry) in zip(missing, parsed):
+            cache.put(entry_hash, bibentry.type, bibentry.key,
+                      bibentry.fields)
+            bibentries[position] = bibentry
+        return bibentries
+
+    @staticmethod
+    def cache_settings(key_format=None, omit_fields=None, keep_fields=None):
+        """String representation of all settings affecting parsed entries."""
+        key_format = compile_key_format(key_format)
+        settings = [None, None, omit_fields, keep_fields]
+        if key_format is not None:
+            settings[0] = key_format.key_format
+            if key_format.function_words is not None:
+                settings[1] = sorted(key_format.function_words)
+        return json.dumps(settings)
 
     def parse_bibtex_entries(self):
-        """Parse entries from file."""
-        bibtex_content_str = self.load_bibtex_contents()
-        entry_locations = self.strip_down_entries(bibtex_content_str)
-        entries = []
-        for (entry_start, entry_stop) in entry_locations:
-            entry_str = bibtex_content_str[entry_start:entry_stop]
-            entries.append(entry_str)
-        return entries
+        """
+        Parse entries from file (streamed without loading the full file).
+
+        The signature of the streamed contents is stored as
+        `source_signature` once the file was read (cf. :meth:`save_snapshot`).
+        """
+        source = SourceReader(self.bibtex_file)
+        with io.TextIOWrapper(io.BufferedReader(source)) as bibfile:
+            if self.stats.enabled:
+                self.stats.count('bytes', os.fstat(source.fileno()).st_size)
+                reader = self.stats.timed_reader(bibfile, 'read')
+                yield from self.stats.timed_iter(iter_entry_strings(reader),
+                                                 'split')
+            else:
+                yield from iter_entry_strings(bibfile)
+            self.source_signature = source.signature()
 
     def load_bibtex_contents(self):
         """Load the file contents into a string."""
@@ -174,47 +899,357 @@ class BibTexFile(object):
             contents = bibfile.read()
         return contents
     
-    def strip_down_entries(self, content):
-        """Identify single entries in the bibtex output file."""
-        content_iterator = enumerate(content)
-        bibtex_entries = []
-        for (index, char) in content_iterator:
-            if char == '@':
-                start_index = index
-            if char == '{':
-                stack = 1
-                while stack != 0:
-                    try:
-                        next_index, next_char = next(content_iterator)
-                    except StopIteration:
-                        raise Exception("Unbalanced braces error during the "
-                                        "parsing of entry {}".format(content))
-                    if next_char == '}':
-                        stack -= 1
-                    elif next_char == '{':
-                        stack += 1
-                bibtex_entries.append((start_index, next_index+1))
+    @staticmethod
+    def strip_down_entries(content):
+        """
+        Identify single entries in the bibtex output file.
+
+        Only the structural chars '@', '{' and '}' are visited, such that
+        the content may also be given as bytes or memory-mapped file.
+
+        :param content: the bibtex file contents as str, bytes or mmap
+        :returns: list of (start, stop) indices of all entries
+        """
+        if isinstance(content, str):
+            structure_regex, at, opening = _STRUCTURE_REGEX, '@', '{'
+        else:
+            structure_regex, at, opening = _BYTES_STRUCTURE_REGEX, b'@', b'{'
+        (bibtex_entries, start_index, depth) = _locate_entries(
+            structure_regex.finditer(content), at, opening)
+        if depth != 0:
+            raise Exception("Unbalanced braces error during the parsing of "
+                            "entry {}".format(content[start_index:]))
         return bibtex_entries
 
     def num_to_char(self, number):
         """
         Map the given number on chars a-z.
 
-        All numbers N for 0 <= N <= 25 will be mapped on the chars a-z
-        and numbers N > 25 will be mapped on the chars aa-zz.
+        All numbers N for 0 <= N <= 25 will be mapped on the chars a-z,
+        numbers 26 <= N <= 701 will be mapped on the chars aa-zz, followed
+        by aaa-zzz and so on (i.e. bijective base-26 numbers).
 
         :param int number: number transformed to char representation
         """
         offset = ord('a')
-        minor = number % 26
-        major = number // 26 - 1
-        return chr(offset + major) * (major >= 0)  + chr(offset + minor)
+        chars = []
+        number += 1
+        while number > 0:
+            (number, remainder) = divmod(number - 1, 26)
+            chars.append(chr(offset + remainder))
+        return "".join(reversed(chars))
+
+    def ordered_indices(self, indices):
+        """Order the indices of colliding entries to assign suffixes."""
+        if self.disambiguation == 'content':
+            return sorted(indices, key=lambda index: (
+                entry_identity(self.entries[index]), index))
+        return indices
 
     def resolve_unambiguous_keys(self):
-        """Resolve ambiguous bibtex keys."""
+        """
+        Resolve ambiguous bibtex keys.
+
+        Colliding keys get the suffixes a-z, aa-zz, ... appended in the
+        order of the entries in the file ('position' strategy) or in the
+        order of the entry identities ('content' strategy) which does not
+        depend on the position of the entries.
+        """
         for (key, indices) in self.key_map.items():
+            if self.key_registry is not None:
+                self.resolve_registered_keys(key, indices)
+                continue
             # do nothing if the key is unique already
             if len(indices) == 1: continue
             # otherwise append a-z / aa-zz to the key
-            for (i, index) in enumerate(indices):
+            for (i, index) in enumerate(self.ordered_indices(indices)):
                 self.entries[index].key = key + self.num_to_char(i)
+        self.invalidate_indexes()
+
+    def resolve_registered_keys(self, key, indices):
+        """
+        Resolve ambiguous bibtex keys keeping the registered keys.
+
+        Entries which have a key registered (that is still valid for the
+        generated key) keep it, new entries get the first suffix not
+        registered for any other entry assigned. Duplicate entries (i.e.
+        entries of the same identity) get the registered keys of their
+        identity in order.
+        """
+        taken = set()
+        pending = []  # (index, identity) of entries without registered key
+        for index in self.ordered_indices(indices):
+            identity = entry_identity(self.entries[index])
+            for registered in self.key_registry.get(identity):
+                if (registered not in taken and registered.startswith(key)
+                        and _KEY_SUFFIX_REGEX.fullmatch(registered, len(key))):
+                    taken.add(registered)
+                    self.entries[index].key = registered
+                    break
+            else:
+                pending.append((index, identity))
+        registry = self.key_registry
+        suffix = 0
+        for (index, identity) in pending:
+            if len(indices) == 1 and not registry.is_registered(key):
+                new_key = key
+            else:
+                new_key = key + self.num_to_char(suffix)
+                while new_key in taken or registry.is_registered(new_key):
+                    suffix += 1
+                    new_key = key + self.num_to_char(suffix)
+            taken.add(new_key)
+            self.entries[index].key = new_key
+            self.key_registry.register(identity, new_key)
+
+
+def compile_key_format(key_format):
+    """Compile the given key format string unless it is compiled already."""
+    if key_format is None or isinstance(key_format, CompiledKeyFormat):
+        return key_format
+    return CompiledKeyFormat(key_format)
+
+
+def iter_entry_strings(bibtex_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate over the raw entry strings contained in a bibtex file.
+
+    The file is read in chunks of `chunk_size` characters and the brace
+    depth is carried across chunk boundaries, such that only the entry
+    currently being assembled has to be kept in memory.
+
+    :param bibtex_file: path to the bibtex file or an open file object
+    :param int chunk_size: number of characters read from the file at once
+    """
+    if hasattr(bibtex_file, 'read'):
+        yield from _scan_entry_strings(bibtex_file, chunk_size)
+    else:
+        with open(bibtex_file, 'r') as bibfile:
+            yield from _scan_entry_strings(bibfile, chunk_size)
+
+
+def _scan_entry_strings(bibfile, chunk_size):
+    """Yield the entry strings read chunkwise from an open file object."""
+    structure_regex = _STRUCTURE_REGEX
+    buffer = ''
+    scan_index = 0  # position in buffer where to continue scanning
+    start_index = None  # start of the entry currently assembled
+    depth = 0
+    while True:
+        chunk = bibfile.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        (entries, start_index, depth) = _locate_entries(
+            structure_regex.finditer(buffer, scan_index), '@', '{',
+            start_index, depth)
+        for (entry_start, entry_stop) in entries:
+            yield buffer[entry_start:entry_stop]
+        # only keep the contents of the entry that is not yet completed
+        if start_index is None:
+            buffer = ''
+            scan_index = 0
+        else:
+            buffer = buffer[start_index:]
+            scan_index = len(buffer)
+            start_index = 0
+    if depth != 0:
+        raise Exception("Unbalanced braces error during the parsing of "
+                        "entry {}".format(buffer))
+
+
+def _locate_entries(matches, at, opening, start_index=None, depth=0):
+    """
+    Locate the entries among the matches of the structural chars.
+
+    As for BibTeX all text outside of entries is a comment, i.e. braces at
+    the top level only open an entry if an '@' was seen before, other
+    braces at the top level are skipped.
+
+    :param matches: matches of '@', '{' and '}' (str or bytes)
+    :param at: the '@' char (str or bytes)
+    :param opening: the '{' char (str or bytes)
+    :param int start_index: start of an entry begun by previous matches
+    :param int depth: brace depth after the previous matches
+    :returns: list of (start, stop) indices of the completed entries, the
+        start of the incomplete entry (None if there is none) and the brace
+        depth
+    """
+    entries = []
+    for match in matches:
+        char = match.group()
+        if depth == 0:
+            if char == at:
+                start_index = match.start()
+            elif char == opening and start_index is not None:
+                depth = 1
+        elif char == opening:
+            depth += 1
+        else:  # closing brace
+            depth -= 1
+            if depth == 0:
+                entries.append((start_index, match.end()))
+                start_index = None
+    return (entries, start_index, depth)
+
+
+def iter_mapped_entry_strings(bibtex_file, encoding=None):
+    """
+    Iterate over the raw entry strings of a memory-mapped bibtex file.
+
+    Entries are located directly on the raw bytes of the file and only the
+    found entries are decoded. The encoding therefore has to be compatible
+    to ASCII (e.g. UTF-8) which is the case for all Zotero exports.
+
+    :param str bibtex_file: path to the bibtex file
+    :param str encoding: encoding of the file (defaults to the same
+        encoding used by :func:`open`)
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    with open(bibtex_file, 'rb') as bibfile:
+        if os.fstat(bibfile.fileno()).st_size == 0:
+            return  # empty files cannot be mapped
+        with mmap.mmap(bibfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            entry_locations = BibTexFile.strip_down_entries(mapped)
+            for (entry_start, entry_stop) in entry_locations:
+                entry = mapped[entry_start:entry_stop].decode(encoding)
+                # translate newlines as done by files opened in text mode
+                yield entry.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def iter_entries(bibtex_file, key_format=None, omit_fields=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, lazy=False, keep_fields=None):
+    """
+    Iterate over the entries of a bibtex file one at a time.
+
+    In contrast to :class:`BibTexFile` entries are not kept in memory, and
+    keys are therefore not checked for collisions.
+
+    :param bibtex_file: path to the bibtex file or an open file object
+    :param str key_format: optional format used to generate entry keys
+    :param str omit_fields: comma separated list of fields to skip
+    :param int chunk_size: number of characters read from the file at once
+    :param bool lazy: only decode field contents when they are accessed
+    :param str keep_fields: comma separated list of the only fields to keep
+    """
+    key_format = compile_key_format(key_format)
+    for entry in iter_entry_strings(bibtex_file, chunk_size=chunk_size):
+        yield BibEntry(entry, key_format=key_format, omit_fields=omit_fields,
+                       lazy=lazy, keep_fields=keep_fields)
+
+
+def parse_entries(entry_strings, key_format=None, omit_fields=None, workers=1,
+                  stats=None, indices=None, lazy=False, keep_fields=None):
+    """
+    Parse raw entry strings either serially or in worker processes.
+
+    :param int workers: number of worker processes, a value of `None`
+        uses all available processors and `1` parses all entries in the
+        current process
+    :param stats: optional :class:`~zotero_bibtize.stats.Stats` instance
+        collecting timings (per-entry timings are only available if entries
+        are parsed in the current process)
+    :param indices: optional indices of the entry strings in the bibtex file
+        reported in the statistics (defaults to their position)
+    :param bool lazy: only decode field contents when they are accessed
+    :param str keep_fields: comma separated list of the only fields to keep
+    """
+    if stats is None:
+        stats = NULL_STATS
+    if workers is None or workers > 1:
+        return stats.timed_iter(
+            parse_entries_parallel(entry_strings, key_format=key_format,
+                                   omit_fields=omit_fields, workers=workers,
+                                   lazy=lazy, keep_fields=keep_fields),
+            'parse (workers)')
+    key_format = compile_key_format(key_format)
+    if stats.enabled:
+        return _parse_entries_with_stats(entry_strings, key_format,
+                                         omit_fields, stats, indices, lazy,
+                                         keep_fields)
+    return (BibEntry(entry, key_format=key_format, omit_fields=omit_fields,
+                     lazy=lazy, keep_fields=keep_fields)
+            for entry in entry_strings)
+
+
+def _parse_entries_with_stats(entry_strings, key_format, omit_fields, stats,
+                              indices=None, lazy=False, keep_fields=None):
+    """Parse raw entry strings recording the time spent on every entry."""
+    if indices is None:
+        indices = itertools.count()
+    for (index, entry) in zip(indices, entry_strings):
+        start = time.perf_counter()
+        bibentry = BibEntry(entry, key_format=key_format,
+                            omit_fields=omit_fields, stats=stats, lazy=lazy,
+                            keep_fields=keep_fields)
+        stats.add_entry(index, bibentry.key, time.perf_counter() - start)
+        yield bibentry
+
+
+def parse_entries_parallel(entry_strings, key_format=None, omit_fields=None,
+                           workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                           lazy=False, keep_fields=None):
+    """
+    Parse raw entry strings in a pool of worker processes.
+
+    Entries are sent to the workers in batches of `batch_size` and yielded
+    in the same order as the given entry strings. Only a limited number of
+    batches is submitted at once to keep memory usage bounded. The parse
+    settings are sent once per worker, i.e. every worker keeps its compiled
+    key format (and the cached key fragments) for the whole run.
+
+    :param entry_strings: iterable of raw bibtex entry strings
+    :param key_format: optional format used to generate entry keys
+    :param str omit_fields: comma separated list of fields to skip
+    :param int workers: number of worker processes (defaults to the number
+        of available processors)
+    :param int batch_size: number of entries sent to a worker at once
+    :param bool lazy: only decode field contents when they are accessed
+    :param str keep_fields: comma separated list of the only fields to keep
+    """
+    key_format = compile_key_format(key_format)
+    workers = workers or os.cpu_count() or 1
+    batches = _iter_batches(entry_strings, batch_size)
+    # the pool machinery is only loaded if entries are parsed in parallel
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(key_format, omit_fields, lazy, keep_fields)) as pool:
+        max_pending = 2 * workers
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.submit(_parse_entry_batch, batch))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _iter_batches(iterable, batch_size):
+    """Split the iterable into lists of (at most) batch_size items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+# settings of the worker process (key format, omitted fields, lazy, kept
+# fields) set by _init_worker
+_worker_settings = None
+
+
+def _init_worker(key_format, omit_fields, lazy, keep_fields):
+    """Store the parse settings in a newly started worker process."""
+    global _worker_settings
+    _worker_settings = (key_format, omit_fields, lazy, keep_fields)
+
+
+def _parse_entry_batch(entry_strings):
+    """Parse a batch of raw entry strings (run in worker processes)."""
+    (key_format, omit_fields, lazy, keep_fields) = _worker_settings
+    return [BibEntry(entry, key_format=key_format, omit_fields=omit_fields,
+                     lazy=lazy, keep_fields=keep_fields)
+            for entry in entry_strings]